@@ -47,6 +47,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Сжатие ответов (brotli при установленном пакете brotli, иначе gzip) — до middleware, меняющих тело ответа
+    'crypto_api.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -92,6 +94,15 @@ DATABASES = {
     }
 }
 
+# Cache (Redis): ответы API, инвалидация по версиям данных — см. crypto_api/cache.py
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': config('REDIS_CACHE_URL', default='redis://redis:6379/1'),
+        'KEY_PREFIX': 'crypto',
+    }
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 AUTH_PASSWORD_VALIDATORS = [
@@ -156,6 +167,19 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
 
+# Очереди: scraping — задачи с браузером (проекты, монеты), celery — лёгкие служебные задачи.
+# Параллельность задаётся у воркера: celery -A config worker -Q scraping -c N
+CELERY_TASK_DEFAULT_QUEUE = 'celery'
+CELERY_TASK_ROUTES = {
+    'crypto_api.tasks.run_upcoming_task': {'queue': 'scraping'},
+    'crypto_api.tasks.scan_project_task': {'queue': 'scraping'},
+    'crypto_api.tasks.scrape_coin_task': {'queue': 'scraping'},
+    'crypto_api.tasks.run_sequential_pipeline': {'queue': 'scraping'},
+}
+# Задачи с браузером длинные: не набираем их впрок, чтобы свободный воркер мог забрать следующую
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_TASK_ACKS_LATE = True
+
 # Celery Beat Scheduler
 from celery.schedules import crontab
 
@@ -2,12 +2,23 @@
 
 from django.contrib import admin
 from .models import UpcomingCrypto
+from .search import search_projects
+
+# Найденных проектов в списке админки
+ADMIN_SEARCH_LIMIT = 500
 
 @admin.register(UpcomingCrypto)
 class UpcomingCryptoAdmin(admin.ModelAdmin):
     list_display = ('project_name', 'launch_date', 'moni_score')
     search_fields = ('project_name', 'project_symbol')
 
+    def get_search_results(self, request, queryset, search_term):
+        # Вместо icontains по всей таблице — индексированный поиск /api/search/ (в том числе по инвесторам)
+        if not search_term.strip():
+            return queryset, False
+        ids = [result['id'] for result in search_projects(search_term, limit=ADMIN_SEARCH_LIMIT)]
+        return queryset.filter(id__in=ids), False
+
     def has_module_permission(self, request):
         return True
 
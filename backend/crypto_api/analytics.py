@@ -0,0 +1,133 @@
+# backend/crypto_api/analytics.py
+"""
+Сравнение монет между собой по истории OHLC (NumPy).
+
+История всех монет за окно загружается одним запросом в матрицы монета × день,
+по ним за один проход считаются корреляции доходностей, лидеры роста/падения и рейтинг по объёму.
+Ответ кэширует @cached_response(OHLC) до следующего сохранения истории.
+"""
+import math
+
+import numpy as np
+from django.db import connection
+
+# Минимум общих дней с доходностями у пары монет, чтобы корреляция имела смысл
+MIN_OVERLAP = 10
+
+
+def load_matrices(days, symbols=None):
+    """
+    Закрытия и объёмы всех монет (или только symbols) за последние days дней.
+    :return: (символы, первый день, closes, volumes) — матрицы len(символы) × (days + 1), NaN — нет данных
+    """
+    sql = """
+        SELECT symbol, (date - (CURRENT_DATE - %s))::int as day, close_price, volume_usd
+        FROM ohlc
+        WHERE date >= CURRENT_DATE - %s
+          -- Парсер ставит дату по своим часам: день «из будущего» по часам БД не влезает в матрицу
+          AND date <= CURRENT_DATE
+    """
+    args = [days, days]
+    if symbols:
+        sql += " AND symbol = ANY(%s)"
+        args.append(list(symbols))
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, args)
+        rows = cursor.fetchall()
+        cursor.execute("SELECT CURRENT_DATE - %s", [days])
+        start = cursor.fetchone()[0]
+
+    names = sorted({row[0] for row in rows})
+    index = {name: i for i, name in enumerate(names)}
+    closes = np.full((len(names), days + 1), np.nan)
+    volumes = np.full((len(names), days + 1), np.nan)
+    if rows:
+        position = np.array([index[row[0]] for row in rows])
+        day = np.array([row[1] for row in rows])
+        closes[position, day] = np.array([np.nan if row[2] is None else row[2] for row in rows], dtype=float)
+        volumes[position, day] = np.array([np.nan if row[3] is None else row[3] for row in rows], dtype=float)
+    return names, start, closes, volumes
+
+
+def correlation_matrix(returns, min_overlap=MIN_OVERLAP):
+    """
+    Попарная корреляция строк по общим дням (пропуски у каждой пары свои), без цикла по парам.
+    Пары с общими днями меньше min_overlap — NaN.
+    """
+    mask = np.isfinite(returns).astype(float)
+    x = np.where(mask > 0, returns, 0.0)
+    overlap = mask @ mask.T
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Суммы x_i и x_i² по дням, где есть обе монеты пары
+        sum_x = x @ mask.T
+        sum_xx = (x * x) @ mask.T
+        sum_xy = x @ x.T
+        cov = sum_xy - sum_x * sum_x.T / overlap
+        var_x = sum_xx - sum_x ** 2 / overlap
+        var_y = sum_xx.T - sum_x.T ** 2 / overlap
+        corr = cov / np.sqrt(var_x * var_y)
+    corr[(overlap < min_overlap) | ~np.isfinite(corr)] = np.nan
+    return np.clip(corr, -1.0, 1.0)
+
+
+def last_valid(matrix):
+    """Последнее не-NaN значение каждой строки (NaN, если строка пустая)"""
+    valid = np.isfinite(matrix)
+    last = matrix.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1)
+    values = matrix[np.arange(len(matrix)), last]
+    values[~valid.any(axis=1)] = np.nan
+    return values
+
+
+def first_valid(matrix):
+    """Первое не-NaN значение каждой строки (NaN, если строка пустая)"""
+    valid = np.isfinite(matrix)
+    values = matrix[np.arange(len(matrix)), np.argmax(valid, axis=1)]
+    values[~valid.any(axis=1)] = np.nan
+    return values
+
+
+def _number(value, digits):
+    return None if value is None or not math.isfinite(value) else round(float(value), digits)
+
+
+def cross_coin_analytics(days=90, top=10, symbols=None):
+    """
+    Корреляции дневных логарифмических доходностей, лидеры роста/падения за окно и рейтинг по объёму.
+    :return: dict для JSON-ответа
+    """
+    names, start, closes, volumes = load_matrices(days, symbols)
+    if not names:
+        return {"days": days, "from": start.isoformat(), "symbols": [], "correlation": [],
+                "movers": {"gainers": [], "losers": []}, "volume": []}
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.diff(np.log(closes), axis=1)
+        change = last_valid(closes) / first_valid(closes) - 1
+        avg_volume = np.nansum(volumes, axis=1) / np.isfinite(volumes).sum(axis=1)
+    correlation = correlation_matrix(returns)
+    last_volume = last_valid(volumes)
+
+    ranked = [i for i in np.argsort(-change, kind='stable') if math.isfinite(change[i])]
+    by_volume = [i for i in np.argsort(-avg_volume, kind='stable') if math.isfinite(avg_volume[i])]
+
+    return {
+        "days": days,
+        "from": start.isoformat(),
+        "symbols": names,
+        "correlation": [[_number(value, 4) for value in row] for row in correlation.tolist()],
+        "movers": {
+            "gainers": [{"symbol": names[i], "change": _number(change[i], 6)} for i in ranked if change[i] > 0][:top],
+            "losers": [{"symbol": names[i], "change": _number(change[i], 6)} for i in ranked[::-1] if change[i] < 0][:top],
+        },
+        "volume": [
+            {
+                "symbol": names[i],
+                "rank": rank,
+                "avg_volume": _number(avg_volume[i], 2),
+                "last_volume": _number(last_volume[i], 2),
+            }
+            for rank, i in enumerate(by_volume[:top], 1)
+        ],
+    }
@@ -0,0 +1,120 @@
+# backend/crypto_api/cache.py
+"""
+Кэш ответов API с инвалидацией по версиям данных.
+
+У каждого набора данных (coins, tokenomics, ohlc) есть версия в Redis — время последнего сохранения.
+Парсеры после записи в БД вызывают bump_version(...), view помечаются @cached_response(...):
+ключ кэша включает версии, поэтому после парсинга старые ответы просто перестают использоваться.
+Версии же дают ETag и Last-Modified для условных запросов (304 без обращения к БД и Redis-данным).
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.core.cache import cache
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+CACHE_TIMEOUT = 60 * 60 * 24
+
+COINS = 'coins'
+TOKENOMICS = 'tokenomics'
+OHLC = 'ohlc'
+
+
+def _version_key(dataset):
+    return f"version:{dataset}"
+
+
+def get_versions(datasets):
+    """Версии наборов данных; отсутствующие (например, после очистки Redis) инициализируются текущим временем"""
+    keys = [_version_key(dataset) for dataset in datasets]
+    found = cache.get_many(keys)
+    now = time.time()
+    missing = {key: now for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, timeout=None)
+        found.update(missing)
+    return [found[key] for key in keys]
+
+
+def bump_version(*datasets):
+    """Отмечает, что данные изменились. Вызывается парсерами после сохранения в БД"""
+    try:
+        now = time.time()
+        cache.set_many({_version_key(dataset): now for dataset in datasets}, timeout=None)
+    except Exception as e:
+        # Парсер, запущенный без Django или без Redis, не должен падать из-за кэша
+        print(f"⚠️ Не удалось обновить версию кэша {', '.join(datasets)}: {e}")
+
+
+def _request_key(request):
+    params = sorted(request.query_params.lists())
+    raw = f"{request.path}?{params}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def _not_modified(request, etag, last_modified):
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match:
+        # Слабое сравнение: после сжатия клиент присылает W/"..." (см. CompressionMiddleware)
+        tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+        return etag in tags or if_none_match.strip() == '*'
+    if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return if_modified_since is not None and int(last_modified) <= if_modified_since
+
+
+def cached_response(*datasets, timeout=CACHE_TIMEOUT):
+    """
+    Декоратор метода get() у DRF view: кэширует response.data в Redis
+    (потоковые ответы — только заголовки) и отвечает 304 на условные запросы, пока версии datasets не изменились.
+    """
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(view, request, *args, **kwargs):
+            try:
+                versions = get_versions(datasets)
+            except Exception as e:
+                print(f"⚠️ Кэш недоступен: {e}")
+                return method(view, request, *args, **kwargs)
+
+            request_key = _request_key(request)
+            version_tag = "-".join(f"{version:.6f}" for version in versions)
+            # Кэшируются данные, а формат выбирается по Accept при каждом ответе; ETag у каждого формата свой
+            accept = request.headers.get('Accept', '')
+            etag = f'"{hashlib.sha1(f"{request_key}:{version_tag}:{accept}".encode()).hexdigest()}"'
+            last_modified = max(versions)
+            headers = {
+                'ETag': etag,
+                'Last-Modified': http_date(last_modified),
+                'Cache-Control': 'no-cache',
+            }
+
+            if _not_modified(request, etag, last_modified):
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+            cache_key = f"response:{view.__class__.__name__}:{request_key}:{version_tag}"
+            try:
+                cached = cache.get(cache_key)
+            except Exception:
+                cached = None
+            if cached is not None:
+                return Response(cached, headers=headers)
+
+            response = method(view, request, *args, **kwargs)
+            if response.status_code == status.HTTP_200_OK:
+                # Потоковые ответы (StreamingHttpResponse) не кэшируем: их тело не собирается в памяти
+                if isinstance(response, Response):
+                    try:
+                        cache.set(cache_key, response.data, timeout)
+                    except Exception as e:
+                        print(f"⚠️ Не удалось сохранить ответ в кэш: {e}")
+                for header, value in headers.items():
+                    response[header] = value
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,188 @@
+# backend/crypto_api/indicators.py
+"""
+Технические индикаторы по истории OHLC, посчитанные заранее (NumPy).
+
+После сохранения истории (scrape_coin — после каждой монеты, backfill_coin — один раз после всех пачек)
+historical_data.refresh_indicators вызывает update_indicators: пересчитываются только дни начиная
+с самого раннего записанного дня.
+Рекуррентные величины — EMA, средние RSI по Уайлдеру, исторический максимум — продолжаются
+из последней сохранённой строки ohlc_indicators, а окнам SMA, доходностей и волатильности
+достаточно LOOKBACK предыдущих закрытий из ohlc.
+"""
+import math
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from psycopg2.extras import execute_values
+
+from crypto_api.parsers.db_pool import db_connection
+
+SMA_WINDOWS = (7, 30)
+EMA_SPANS = (12, 26)
+RSI_PERIOD = 14
+VOLATILITY_WINDOW = 30
+RETURN_PERIODS = (1, 7, 30)
+# Волатильность в годовом выражении: крипторынок торгуется все 365 дней
+ANNUALIZATION = math.sqrt(365)
+# Предыдущих закрытий достаточно для самого длинного окна
+LOOKBACK = max(max(SMA_WINDOWS), VOLATILITY_WINDOW, max(RETURN_PERIODS))
+# Длина блока векторного расчёта EMA: decay ** EWM_BLOCK ещё далеко от денормализованных чисел
+EWM_BLOCK = 256
+
+# Колонки ohlc_indicators (03_ohlc.sql): индикаторы для API и состояние для продолжения расчёта
+INDICATOR_COLUMNS = (
+    'sma_7', 'sma_30', 'ema_12', 'ema_26', 'rsi_14', 'volatility_30', 'drawdown',
+    'return_1d', 'return_7d', 'return_30d'
+)
+STATE_COLUMNS = ('ema_12', 'ema_26', 'rsi_avg_gain', 'rsi_avg_loss', 'peak')
+STORED_COLUMNS = INDICATOR_COLUMNS + ('rsi_avg_gain', 'rsi_avg_loss', 'peak')
+
+
+def ewm(values, alpha, seed=None):
+    """
+    Экспоненциальное сглаживание y_i = alpha * x_i + (1 - alpha) * y_(i-1) без цикла по дням.
+    Внутри блока рекурсия разворачивается в cumsum: y_i = d^(i+1) * (y_prev + alpha * sum(x_k / d^(k+1))).
+    :param seed: y перед первым значением; без него ряд начинается с первого значения
+    """
+    out = np.empty(len(values))
+    decay = 1.0 - alpha
+    previous = seed
+    for start in range(0, len(values), EWM_BLOCK):
+        block = values[start:start + EWM_BLOCK]
+        if previous is None:
+            previous = block[0]
+        powers = decay ** np.arange(1, len(block) + 1)
+        out[start:start + len(block)] = powers * (previous + alpha * np.cumsum(block / powers))
+        previous = out[start + len(block) - 1]
+    return out
+
+
+def compute_indicators(closes, prior=(), state=None, offset=0):
+    """
+    Индикаторы для новых закрытий.
+    :param closes: закрытия новых дней, от старых к новым
+    :param prior: до LOOKBACK закрытий перед ними (для окон)
+    :param state: STATE_COLUMNS последнего посчитанного дня или None для расчёта с начала истории
+    :param offset: сколько закрытий в истории до closes (RSI не выдаётся первые RSI_PERIOD дней)
+    :return: dict {колонка STORED_COLUMNS: массив длины len(closes)}, NaN — значения нет
+    """
+    closes = np.asarray(closes, dtype=float)
+    prior = np.asarray(prior, dtype=float)
+    series = np.concatenate([prior, closes])
+    start = len(prior)
+    result = {}
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for window in SMA_WINDOWS:
+            sma = np.full(len(series), np.nan)
+            if len(series) >= window:
+                sma[window - 1:] = sliding_window_view(series, window).mean(axis=1)
+            result[f'sma_{window}'] = sma[start:]
+
+        for span in EMA_SPANS:
+            result[f'ema_{span}'] = ewm(closes, 2.0 / (span + 1), state[f'ema_{span}'] if state else None)
+
+        # RSI по Уайлдеру: средние роста и падения сглаживаются с alpha = 1 / RSI_PERIOD
+        deltas = np.diff(series, prepend=series[0])[start:]
+        avg_gain = ewm(np.clip(deltas, 0, None), 1.0 / RSI_PERIOD, state['rsi_avg_gain'] if state else None)
+        avg_loss = ewm(np.clip(-deltas, 0, None), 1.0 / RSI_PERIOD, state['rsi_avg_loss'] if state else None)
+        rsi = 100.0 * avg_gain / (avg_gain + avg_loss)
+        rsi[offset + np.arange(len(closes)) < RSI_PERIOD] = np.nan
+        result[f'rsi_{RSI_PERIOD}'] = rsi
+        result['rsi_avg_gain'] = avg_gain
+        result['rsi_avg_loss'] = avg_loss
+
+        # Стандартное отклонение логарифмических доходностей за окно, в годовом выражении
+        log_returns = np.diff(np.log(series))
+        volatility = np.full(len(series), np.nan)
+        if len(log_returns) >= VOLATILITY_WINDOW:
+            windows = sliding_window_view(log_returns, VOLATILITY_WINDOW)
+            volatility[VOLATILITY_WINDOW:] = windows.std(axis=1, ddof=1) * ANNUALIZATION
+        result[f'volatility_{VOLATILITY_WINDOW}'] = volatility[start:]
+
+        for period in RETURN_PERIODS:
+            returns = np.full(len(series), np.nan)
+            returns[period:] = series[period:] / series[:-period] - 1
+            result[f'return_{period}d'] = returns[start:]
+
+        # Просадка от исторического максимума закрытия
+        seed_peak = state['peak'] if state else -np.inf
+        peak = np.maximum.accumulate(np.concatenate([[seed_peak], closes]))[1:]
+        result['peak'] = peak
+        result['drawdown'] = closes / peak - 1
+
+    for values in result.values():
+        values[~np.isfinite(values)] = np.nan
+    return result
+
+
+def update_indicators(symbol, since=None, conn=None):
+    """
+    Досчитывает индикаторы монеты после сохранения её истории.
+    :param since: самая ранняя дата, затронутая сохранением ('YYYY-MM-DD' или date);
+                  дни начиная с неё пересчитываются, даже если уже были посчитаны
+    :param conn: соединение с БД (по умолчанию — из общего пула)
+    :return: число записанных строк или None при ошибке
+    """
+    symbol = symbol.upper()
+    try:
+        with db_connection(conn) as conn:
+            with conn.cursor() as cursor:
+                # Опорная строка: последний посчитанный день до изменённых
+                cursor.execute(f"""
+                    SELECT date, {', '.join(STATE_COLUMNS)}
+                    FROM ohlc_indicators
+                    WHERE symbol = %s AND (%s::date IS NULL OR date < %s::date)
+                    ORDER BY date DESC
+                    LIMIT 1
+                """, (symbol, since, since))
+                anchor = cursor.fetchone()
+
+                state, prior, offset = None, [], 0
+                if anchor:
+                    anchor_date = anchor[0]
+                    state = dict(zip(STATE_COLUMNS, anchor[1:]))
+                    cursor.execute("""
+                        SELECT close_price FROM ohlc
+                        WHERE symbol = %s AND date <= %s AND close_price IS NOT NULL
+                        ORDER BY date DESC
+                        LIMIT %s
+                    """, (symbol, anchor_date, LOOKBACK))
+                    prior = [row[0] for row in reversed(cursor.fetchall())]
+                    cursor.execute("""
+                        SELECT count(*) FROM ohlc
+                        WHERE symbol = %s AND date <= %s AND close_price IS NOT NULL
+                    """, (symbol, anchor_date))
+                    offset = cursor.fetchone()[0]
+
+                cursor.execute("""
+                    SELECT date, close_price FROM ohlc
+                    WHERE symbol = %s AND close_price IS NOT NULL AND (%s::date IS NULL OR date > %s::date)
+                    ORDER BY date
+                """, (symbol, anchor and anchor[0], anchor and anchor[0]))
+                rows = cursor.fetchall()
+                if not rows:
+                    conn.commit()
+                    return 0
+
+                values = compute_indicators([row[1] for row in rows], prior, state, offset)
+                columns = [[None if math.isnan(value) else value for value in values[name].tolist()]
+                           for name in STORED_COLUMNS]
+
+                cursor.execute(
+                    "DELETE FROM ohlc_indicators WHERE symbol = %s AND (%s::date IS NULL OR date > %s::date)",
+                    (symbol, anchor and anchor[0], anchor and anchor[0])
+                )
+                execute_values(
+                    cursor,
+                    f"INSERT INTO ohlc_indicators (symbol, date, {', '.join(STORED_COLUMNS)}) VALUES %s",
+                    [(symbol, row[0], *day) for row, day in zip(rows, zip(*columns))],
+                    page_size=1000
+                )
+            conn.commit()
+        mode = f"с {rows[0][0]}" if anchor else "вся история"
+        print(f"📐 Индикаторы {symbol} пересчитаны ({mode}): {len(rows)} дней")
+        return len(rows)
+    except Exception as e:
+        print(f"❌ Ошибка расчёта индикаторов {symbol}: {e}")
+        return None
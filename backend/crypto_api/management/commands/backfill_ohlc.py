@@ -0,0 +1,23 @@
+# backend/crypto_api/management/commands/backfill_ohlc.py
+from django.core.management.base import BaseCommand
+from crypto_api.parsers.historical_data import backfill
+from crypto_api.parsers.db_pool import shutdown_db_pool
+from crypto_api.parsers.driver_pool import shutdown_pool
+
+
+class Command(BaseCommand):
+    help = 'Догружает всю историю OHLC (с пагинацией таблицы), продолжая с последней сохранённой даты'
+
+    def add_arguments(self, parser):
+        parser.add_argument('symbols', nargs='*', help='Символы монет (по умолчанию — все из БД)')
+        parser.add_argument('--restart', action='store_true',
+                            help='Пройти историю заново, включая уже догруженные монеты')
+
+    def handle(self, *args, **options):
+        self.stdout.write("📚 ДОГРУЗКА ИСТОРИИ OHLC\n" + "=" * 60)
+        try:
+            backfill(options['symbols'], restart=options['restart'])
+        finally:
+            shutdown_pool()
+            shutdown_db_pool()
+        self.stdout.write(self.style.SUCCESS("✅ Догрузка завершена"))
@@ -0,0 +1,18 @@
+# backend/crypto_api/management/commands/init_db.py
+from pathlib import Path
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+DB_INIT_DIR = Path(settings.BASE_DIR) / 'db_init'
+
+
+class Command(BaseCommand):
+    help = 'Применяет скрипты db_init/*.sql к существующей БД (все скрипты идемпотентны)'
+
+    def handle(self, *args, **options):
+        for script in sorted(DB_INIT_DIR.glob('*.sql')):
+            self.stdout.write(f"📄 {script.name}...")
+            with connection.cursor() as cursor:
+                cursor.execute(script.read_text(encoding='utf-8'))
+        self.stdout.write(self.style.SUCCESS("✅ Схема БД обновлена"))
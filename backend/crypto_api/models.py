@@ -18,8 +18,43 @@ class UpcomingCrypto(models.Model):
     parsed_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
+        # Таблица, уникальный project_url и индексы под /api/coins/ создаются в db_init
+        # (01_tables.sql, 04_upcoming_indexes.sql), миграций у проекта нет
         db_table = 'cryptorank_upcoming'
-        managed = True
+        managed = False
+
+class Tokenomics(models.Model):
+    project = models.OneToOneField(
+        UpcomingCrypto, on_delete=models.SET_NULL, null=True, blank=True,
+        db_column='project_id', related_name='tokenomics_entry'
+    )
+    project_name = models.CharField(max_length=200, unique=True)
+    tokenomics = models.JSONField(null=True, blank=True)
+    parsed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        # Таблица и колонка project_id создаются в db_init (01_tables.sql, 06_tokenomics_project.sql)
+        db_table = 'cryptorank_tokenomics'
+        managed = False
+
+class TokenomicsDetailed(models.Model):
+    """Материализованное представление tokenomics_detailed (07_tokenomics_detailed.sql), только чтение"""
+    project_name = models.CharField(max_length=200, primary_key=True)
+    project_id = models.IntegerField(null=True)
+    parsed_at = models.DateTimeField()
+    distribution_data = models.JSONField(null=True)
+    total_supply = models.TextField(null=True)
+    circulating_supply = models.TextField(null=True)
+    max_supply = models.TextField(null=True)
+    initial_price = models.TextField(null=True)
+    market_cap = models.TextField(null=True)
+    categories_count = models.IntegerField()
+    data_quality = models.TextField()
+
+    class Meta:
+        db_table = 'tokenomics_detailed'
+        managed = False
 
 class UpcomingSoon(models.Model):
     project_name = models.CharField(max_length=200)
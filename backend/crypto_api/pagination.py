@@ -0,0 +1,130 @@
+# backend/crypto_api/pagination.py
+import json
+import operator
+from functools import reduce
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Курсор по всем полям сортировки, а не только по первому.
+    Стандартный CursorPagination позиционируется по первому полю и при повторах его значений
+    досчитывает смещение: на страницах с одинаковыми updated_at строки пропускаются или повторяются.
+    Здесь сортировка всегда заканчивается уникальным unique_field, позиция — значения всех её полей,
+    поэтому следующая страница — строго «после» последней строки, без смещения.
+    Поля сортировки должны быть NOT NULL.
+    """
+    unique_field = 'id'
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if self.unique_field not in [field.lstrip('-') for field in ordering]:
+            # В том же направлении, что и первый ключ: индекс (поле, id) читается целиком вперёд или назад
+            direction = '-' if ordering[0].startswith('-') else ''
+            ordering += (direction + self.unique_field,)
+        return ordering
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for field in ordering:
+            name = field.lstrip('-')
+            value = instance[name] if isinstance(instance, dict) else getattr(instance, name)
+            values.append(None if value is None else str(value))
+        return json.dumps(values, ensure_ascii=False)
+
+    def after_position(self, position, reverse):
+        """Строки строго после позиции в порядке выдачи: (a > x) OR (a = x AND b > y) OR ..."""
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        branches = []
+        equal = Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            # Курсор назад (reverse) XOR убывающее поле — идём к меньшим значениям
+            lookup = 'lt' if reverse != field.startswith('-') else 'gt'
+            branches.append(equal & Q(**{f'{name}__{lookup}': value}))
+            equal &= Q(**{name: value})
+        return reduce(operator.or_, branches)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        # Как CursorPagination.paginate_queryset, но фильтр позиции — по всем полям сортировки
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if str(current_position) != 'None':
+            queryset = queryset.filter(self.after_position(current_position, reverse))
+
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = list(results[:self.page_size])
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+
+class CoinCursorPagination(KeysetCursorPagination):
+    """
+    Курсорная пагинация списка монет: ?cursor=...&page_size=...
+    Сортировку задаёт ?ordering= (см. CryptoListAPIView.ordering_fields), id добавляется последним
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = 'id'
+
+
+class TokenomicsCursorPagination(KeysetCursorPagination):
+    """Курсорная пагинация tokenomics_detailed: свежие сначала, project_name (ключ представления) — для однозначного порядка"""
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = ('-parsed_at', 'project_name')
+    unique_field = 'project_name'
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Общий пул соединений с PostgreSQL для всех парсеров и задач Celery.
+
+Парсеры не вызывают psycopg2.connect сами, а арендуют соединение:
+
+    with get_db_pool().connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(...)
+        conn.commit()
+
+Незакоммиченная транзакция при возврате откатывается, соединение после ошибки связи закрывается.
+Не больше DB_POOL_MAX соединений на процесс: параллельные воркеры ждут свободное
+до DB_POOL_TIMEOUT секунд, а не открывают новые сверх лимита max_connections.
+Пулер перед PostgreSQL (PgBouncer) допустим только в режиме session: save_to_db держит
+TEMP-таблицу ohlc_staging между транзакциями соединения, а API читает OHLC серверными курсорами
+(chunked_cursor). В режиме transaction и то и другое ломается.
+"""
+import atexit
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from psycopg2 import extensions
+from psycopg2.pool import PoolError, ThreadedConnectionPool
+
+# Переменные из .env должны быть загружены до чтения DB_CONFIG
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+DB_CONFIG = {
+    'host': os.environ.get('DB_HOST', 'localhost'),
+    'port': os.environ.get('DB_PORT', '5432'),
+    'database': os.environ.get('DB_NAME', 'crypto_db'),
+    'user': os.environ.get('DB_USER', 'crypto_user'),
+    'password': os.environ.get('DB_PASSWORD', 'crypto_password')
+}
+
+MIN_CONNECTIONS = int(os.environ.get('DB_POOL_MIN', '1'))
+MAX_CONNECTIONS = int(os.environ.get('DB_POOL_MAX', '5'))
+ACQUIRE_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', '30'))
+
+
+class DatabasePool:
+    """
+    Потокобезопасный пул из не более чем maxconn соединений.
+    В отличие от ThreadedConnectionPool, при исчерпании не бросает PoolError сразу,
+    а ждёт освобождения соединения до timeout секунд.
+    """
+
+    def __init__(self, minconn=MIN_CONNECTIONS, maxconn=MAX_CONNECTIONS, timeout=ACQUIRE_TIMEOUT):
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self._pool = ThreadedConnectionPool(minconn, maxconn, **DB_CONFIG)
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._stats = {
+            'leases': 0,
+            'timeouts': 0,
+            'discarded': 0,
+            'in_use_max': 0,
+            'wait_total': 0.0,
+            'wait_max': 0.0,
+            'lease_total': 0.0,
+            'lease_max': 0.0,
+        }
+
+    @contextmanager
+    def connection(self):
+        """
+        Выдаёт соединение на время блока with.
+        При исключении транзакция откатывается; если откатить не удалось, соединение закрывается.
+        """
+        requested = time.monotonic()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self._stats['timeouts'] += 1
+            raise PoolError(f"нет свободного соединения с БД за {self.timeout:g} сек. (лимит {self.maxconn})")
+        try:
+            conn = self._pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+
+        leased = time.monotonic()
+        wait = leased - requested
+        with self._lock:
+            self._in_use += 1
+            self._stats['leases'] += 1
+            self._stats['wait_total'] += wait
+            self._stats['wait_max'] = max(self._stats['wait_max'], wait)
+            self._stats['in_use_max'] = max(self._stats['in_use_max'], self._in_use)
+
+        broken = False
+        try:
+            yield conn
+        finally:
+            if not conn.closed and conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except Exception:
+                    broken = True
+            broken = broken or bool(conn.closed)
+            held = time.monotonic() - leased
+            with self._lock:
+                self._in_use -= 1
+                self._stats['lease_total'] += held
+                self._stats['lease_max'] = max(self._stats['lease_max'], held)
+                if broken:
+                    self._stats['discarded'] += 1
+            try:
+                self._pool.putconn(conn, close=broken)
+            finally:
+                self._slots.release()
+
+    def stats(self):
+        """Метрики пула: число аренд, ожиданий по таймауту и времена ожидания/владения в секундах"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['in_use'] = self._in_use
+        stats['size'] = self.maxconn
+        leases = stats['leases'] or 1
+        stats['wait_avg'] = stats['wait_total'] / leases
+        stats['lease_avg'] = stats['lease_total'] / leases
+        return stats
+
+    def report(self):
+        """Печатает метрики пула"""
+        s = self.stats()
+        print(f"🗄️ Пул соединений с БД: аренд {s['leases']}, занято максимум {s['in_use_max']}/{s['size']}, "
+              f"таймаутов {s['timeouts']}, закрыто сломанных {s['discarded']}")
+        print(f"   ⏳ Ожидание соединения: среднее {s['wait_avg']:.3f} сек., максимум {s['wait_max']:.3f} сек.")
+        print(f"   🕒 Владение соединением: среднее {s['lease_avg']:.3f} сек., максимум {s['lease_max']:.3f} сек.")
+
+    def shutdown(self):
+        """Закрывает все соединения пула"""
+        try:
+            self._pool.closeall()
+        except PoolError:
+            pass
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def get_db_pool():
+    """
+    Возвращает общий для процесса пул соединений.
+    После fork (процессы prefork-воркера Celery) пул создаётся заново: соединения родителя не наследуются.
+    """
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = DatabasePool()
+            _pool_pid = os.getpid()
+            atexit.register(_pool.shutdown)
+        return _pool
+
+
+@contextmanager
+def db_connection(conn=None):
+    """
+    Переданное соединение как есть, иначе — арендованное из общего пула.
+    Для функций с необязательным параметром conn: вызывающий может провести несколько шагов в одном соединении.
+    """
+    if conn is None:
+        with get_db_pool().connection() as leased:
+            yield leased
+        return
+    try:
+        yield conn
+    except BaseException:
+        if not conn.closed:
+            conn.rollback()
+        raise
+
+
+def shutdown_db_pool():
+    """Печатает метрики и закрывает соединения общего пула (вызывается в конце пайплайна)"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.report()
+        pool.shutdown()
+        print("🔒 Пул соединений с БД закрыт")
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Разбор снимков DOM без обращений к WebDriver.
+
+Вместо find_elements/.text по каждой строке и ячейке (отдельный HTTP-запрос к chromedriver на каждый вызов)
+берём page_source или outerHTML таблицы одним запросом и разбираем его lxml в процессе.
+Живой Selenium остаётся только для интерактивных шагов — пагинации, прокрутки, координат элементов.
+"""
+import os
+
+try:
+    import lxml.html
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+# PARSER_DOM_SNAPSHOT=0 возвращает старый режим с чтением каждой ячейки через WebDriver
+SNAPSHOT_MODE = HAS_LXML and os.environ.get('PARSER_DOM_SNAPSHOT', '1') != '0'
+
+
+def parse_html(html, base_url=None):
+    """Разбирает HTML и делает ссылки абсолютными (как element.get_attribute('href'))"""
+    root = lxml.html.fromstring(html, base_url=base_url)
+    if base_url:
+        root.make_links_absolute(base_url, handle_failures='ignore')
+    return root
+
+
+def element_snapshot(element, base_url=None):
+    """Снимок WebElement одним запросом: outerHTML → дерево lxml"""
+    return parse_html(element.get_attribute('outerHTML'), base_url)
+
+
+def node_text(node):
+    """Текст узла с нормализованными пробелами — аналог однострочного element.text"""
+    return ' '.join(node.text_content().split())
+
+
+def node_lines(node):
+    """Непустые текстовые фрагменты узла — аналог element.text.split('\\n') для многострочных ячеек"""
+    return [part for part in (' '.join(text.split()) for text in node.itertext()) if part]
+
+
+def first_href(node, contains=None):
+    """Первая ссылка внутри узла, опционально содержащая одну из подстрок contains"""
+    for link in node.iter('a'):
+        href = link.get('href')
+        if not href:
+            continue
+        if contains is None or any(part in href for part in contains):
+            return href
+    return ""
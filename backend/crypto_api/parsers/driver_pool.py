@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Общий пул headless-браузеров для всех парсеров.
+
+Парсеры не запускают Chrome сами, а арендуют готовый драйвер:
+
+    with get_pool().lease() as driver:
+        driver.get(url)
+
+После DRIVER_MAX_PAGES аренд драйвер пересоздаётся, чтобы Chrome не накапливал память.
+"""
+import atexit
+import os
+import threading
+import time
+from contextlib import contextmanager
+from selenium import webdriver
+
+POOL_SIZE = int(os.environ.get('DRIVER_POOL_SIZE', '3'))
+MAX_PAGES = int(os.environ.get('DRIVER_MAX_PAGES', '10'))
+DEFAULT_IMPLICIT_WAIT = 8
+
+
+def build_options():
+    """Единые настройки Chrome: картинки отключены, стили и шрифты включены (нужны для легенд токеномики)"""
+    options = webdriver.ChromeOptions()
+    options.add_argument('--headless=new')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--disable-gpu')
+    options.add_argument('--disable-extensions')
+    options.add_argument('--disable-blink-features=AutomationControlled')
+    options.add_argument('--no-first-run')
+    options.add_argument('--window-size=1920,1080')
+    options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
+    options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings": {
+            "images": 2,
+            "stylesheets": 1,
+            "fonts": 1,
+            "javascript": 1,
+            "plugins": 2,
+            "popups": 2,
+            "geolocation": 2,
+            "notifications": 2
+        }
+    })
+    return options
+
+
+class DriverPool:
+    """
+    Пул из не более чем size драйверов Chrome.
+    Свободные драйверы хранятся прогретыми и выдаются через lease(),
+    каждый драйвер пересоздаётся после max_pages аренд.
+    """
+
+    def __init__(self, size=POOL_SIZE, max_pages=MAX_PAGES):
+        self.size = size
+        self.max_pages = max_pages
+        self._cond = threading.Condition()
+        self._idle = []
+        self._pages = {}
+        self._replacements = {}
+        self._total = 0
+        self._stats = {
+            'leases': 0,
+            'started': 0,
+            'recycled': 0,
+            'discarded': 0,
+            'wait_total': 0.0,
+            'wait_max': 0.0,
+            'lease_total': 0.0,
+            'lease_max': 0.0,
+        }
+
+    def _start_driver(self):
+        started = time.monotonic()
+        driver = webdriver.Chrome(options=build_options())
+        with self._cond:
+            self._pages[id(driver)] = 0
+            self._stats['started'] += 1
+        print(f"   🔧 Браузер запущен за {time.monotonic() - started:.1f} сек.")
+        return driver
+
+    def _quit_driver(self, driver):
+        with self._cond:
+            self._pages.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def warm(self, count=None):
+        """Заранее запускает count драйверов (по умолчанию — весь пул) параллельно"""
+        with self._cond:
+            count = min(count or self.size, self.size - self._total)
+            self._total += max(count, 0)
+        if count <= 0:
+            return
+
+        def start():
+            try:
+                driver = self._start_driver()
+            except Exception as e:
+                print(f"   ❌ Ошибка запуска браузера: {e}")
+                with self._cond:
+                    self._total -= 1
+                    self._cond.notify()
+                return
+            with self._cond:
+                self._idle.append(driver)
+                self._cond.notify()
+
+        threads = [threading.Thread(target=start, daemon=True) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def _acquire(self):
+        with self._cond:
+            while not self._idle and self._total >= self.size:
+                self._cond.wait()
+            if self._idle:
+                return self._idle.pop()
+            self._total += 1
+        try:
+            return self._start_driver()
+        except Exception:
+            with self._cond:
+                self._total -= 1
+                self._cond.notify()
+            raise
+
+    def _release(self, driver, broken):
+        driver = self._resolve(driver)
+        with self._cond:
+            pages = self._pages.get(id(driver), 0) + 1
+            self._pages[id(driver)] = pages
+            recycle = broken or pages >= self.max_pages
+            if recycle:
+                self._stats['discarded' if broken else 'recycled'] += 1
+                self._total -= 1
+            else:
+                self._idle.append(driver)
+            self._cond.notify()
+        if recycle:
+            self._quit_driver(driver)
+
+    def _resolve(self, driver):
+        with self._cond:
+            while id(driver) in self._replacements:
+                driver = self._replacements.pop(id(driver))
+        return driver
+
+    @contextmanager
+    def lease(self, implicit_wait=DEFAULT_IMPLICIT_WAIT):
+        """
+        Выдаёт драйвер на время блока with.
+        Если внутри блока возникло исключение, драйвер считается сломанным и закрывается.
+        """
+        requested = time.monotonic()
+        driver = self._acquire()
+        leased = time.monotonic()
+        wait = leased - requested
+        with self._cond:
+            self._stats['leases'] += 1
+            self._stats['wait_total'] += wait
+            self._stats['wait_max'] = max(self._stats['wait_max'], wait)
+        broken = False
+        try:
+            driver.implicitly_wait(implicit_wait)
+            yield driver
+        except BaseException:
+            broken = True
+            raise
+        finally:
+            held = time.monotonic() - leased
+            with self._cond:
+                self._stats['lease_total'] += held
+                self._stats['lease_max'] = max(self._stats['lease_max'], held)
+            self._release(driver, broken)
+
+    def restart(self, driver, implicit_wait=DEFAULT_IMPLICIT_WAIT):
+        """Заменяет зависший арендованный драйвер новым; аренда продолжается с новым драйвером"""
+        self._quit_driver(driver)
+        new_driver = self._start_driver()
+        new_driver.implicitly_wait(implicit_wait)
+        with self._cond:
+            self._replacements[id(driver)] = new_driver
+            self._stats['discarded'] += 1
+        return new_driver
+
+    def stats(self):
+        """Метрики пула: число аренд, запусков Chrome и времена ожидания/владения в секундах"""
+        with self._cond:
+            stats = dict(self._stats)
+            stats['idle'] = len(self._idle)
+            stats['total'] = self._total
+        leases = stats['leases'] or 1
+        stats['wait_avg'] = stats['wait_total'] / leases
+        stats['lease_avg'] = stats['lease_total'] / leases
+        return stats
+
+    def report(self):
+        """Печатает метрики пула"""
+        s = self.stats()
+        print(f"🧰 Пул браузеров: аренд {s['leases']}, запусков Chrome {s['started']}, "
+              f"пересозданий {s['recycled']}, сломанных {s['discarded']}")
+        print(f"   ⏳ Ожидание аренды: среднее {s['wait_avg']:.2f} сек., максимум {s['wait_max']:.2f} сек.")
+        print(f"   🕒 Владение драйвером: среднее {s['lease_avg']:.2f} сек., максимум {s['lease_max']:.2f} сек.")
+
+    def shutdown(self):
+        """Закрывает все свободные драйверы"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._total -= len(idle)
+        for driver in idle:
+            self._quit_driver(driver)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Возвращает общий для процесса пул браузеров"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = DriverPool()
+            atexit.register(_pool.shutdown)
+        return _pool
+
+
+def shutdown_pool():
+    """Закрывает браузеры общего пула (вызывается в конце пайплайна)"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.report()
+        pool.shutdown()
+        print("🔒 Пул браузеров закрыт")
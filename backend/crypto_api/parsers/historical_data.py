@@ -1,42 +1,68 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
+import csv
+import io
 import json
 import time
 import os
-from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from datetime import datetime
-import psycopg2
-
-# Настройки БД
-DB_CONFIG = {
-    'host': os.environ.get('DB_HOST', 'localhost'),
-    'port': os.environ.get('DB_PORT', '5432'),
-    'database': os.environ.get('DB_NAME', 'crypto_db'),
-    'user': os.environ.get('DB_USER', 'crypto_user'),
-    'password': os.environ.get('DB_PASSWORD', 'crypto_password')
-}
-
-def setup_driver():
-    """Настройка браузера"""
-    print("🔧 Запуск браузера...")
-    options = webdriver.ChromeOptions()
-    options.add_argument('--headless=new')
-    options.add_argument('--no-sandbox')
-    options.add_argument('--disable-dev-shm-usage')
-    options.add_argument('--disable-images')
-    options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
-    options.add_argument('--window-size=1920,1080')
-    options.add_argument(f'--cache-dir={os.environ.get("WEBDRIVER_CACHE_DIR", "/app/.cache/selenium")}')
-    driver = webdriver.Chrome(options=options)
-    driver.implicitly_wait(10)
-    print("   ✅ Браузер готов")
-    return driver
-
-def convert_date_format(date_text):
-    """Конвертирует дату из '11 Aug' или 'Aug 11' в 'YYYY-MM-DD'"""
+from datetime import date as date_cls, datetime
+from pathlib import Path
+
+from crypto_api.cache import OHLC, bump_version
+from crypto_api.indicators import update_indicators
+from crypto_api.parsers.db_pool import db_connection
+from crypto_api.parsers.dom import SNAPSHOT_MODE, element_snapshot, node_text
+from crypto_api.parsers.driver_pool import get_pool
+from crypto_api.parsers.paging import find_next_page_button
+from crypto_api.parsers.readiness import wait_for, wait_for_dom_stable, report_latencies
+
+
+# Схема единой таблицы ohlc и перенос старых таблиц ohlc_<symbol>
+OHLC_SCHEMA_SQL = Path(__file__).resolve().parents[2] / 'db_init' / '03_ohlc.sql'
+
+OHLC_COLUMNS = (
+    'date', 'open_price', 'high_price', 'low_price', 'med_price',
+    'close_price', 'change_percent', 'volume_usd', 'change_volume_percent', 'market_cap'
+)
+
+TABLE_HEADERS = (
+    "Date", "Open", "High", "Low", "Med", "Close",
+    "Change", "Volume", "Change Volume", "Market Cap"
+)
+
+# Глубокая догрузка истории: строк в одной пачке записи в БД, предел страниц и пауза между ними
+BACKFILL_CHUNK_SIZE = int(os.environ.get('OHLC_BACKFILL_CHUNK_SIZE', '500'))
+BACKFILL_MAX_PAGES = int(os.environ.get('OHLC_BACKFILL_MAX_PAGES', '1000'))
+BACKFILL_PAGE_DELAY = float(os.environ.get('OHLC_BACKFILL_PAGE_DELAY', '1'))
+
+# Ячейки строк таблицы после offset одним запросом (таблица ищется заново: после смены страницы узел может смениться)
+ROWS_AFTER_JS = """
+const table = document.querySelector('table');
+if (!table) return [];
+return Array.from(table.querySelectorAll('tr')).slice(arguments[0])
+    .map(row => Array.from(row.querySelectorAll('td')).map(cell => cell.textContent));
+"""
+
+# Число строк и текст первой строки с данными — по ним видно, догрузилась ли таблица
+TABLE_STATE_JS = """
+const table = document.querySelector('table');
+if (!table) return [0, ''];
+const first = table.querySelector('tr td');
+return [table.querySelectorAll('tr').length, first ? first.closest('tr').textContent : ''];
+"""
+
+# OHLC_INCREMENTAL=0 — перечитывать всю видимую историю, не останавливаясь на последней сохранённой дате
+INCREMENTAL = os.environ.get('OHLC_INCREMENTAL', '1') != '0'
+
+def convert_date_format(date_text, today=None):
+    """
+    Конвертирует дату из '11 Aug' или 'Aug 11' (или с годом: '11 Aug 2023') в 'YYYY-MM-DD'.
+    Если год в таблице не указан, берём текущий, а даты «из будущего» относим к прошлому году;
+    для строк старше года его исправляет align_year.
+    """
     if not date_text or date_text == 'TBA':
         return None
     try:
@@ -48,18 +74,64 @@ def convert_date_format(date_text):
         parts = date_text.strip().split()
         if len(parts) < 2:
             return None
-        day, month_text = None, None
+        day, month_text, year = None, None, None
         for p in parts:
-            if p.isdigit():
-                day = p.zfill(2)
+            p = p.rstrip(',')
+            if p.isdigit() and len(p) == 4:
+                year = int(p)
+            elif p.isdigit():
+                day = int(p)
             elif p[:3] in months:
                 month_text = p[:3]
         if day and month_text:
-            return f"2025-{months[month_text]}-{day}"
+            month = int(months[month_text])
+            if year:
+                return date_cls(year, month, day).isoformat()
+            today = today or date_cls.today()
+            year = today.year
+            while True:
+                try:
+                    result = date_cls(year, month, day)
+                except ValueError:  # 29 февраля: ближайший прошедший високосный год
+                    year -= 1
+                    continue
+                if result <= today:
+                    return result.isoformat()
+                year -= 1
         return None
     except:
         return None
 
+# Строка «новее» предыдущей меньше чем на полгода — повтор или сбой порядка, а не переход через январь
+YEAR_WRAP_MIN_DAYS = 183
+
+def align_year(date, previous):
+    """
+    Год строки таблицы, идущей от новых дней к старым. Без года в таблице convert_date_format
+    относит все даты к последним двенадцати месяцам, и глубже года они повторяются по кругу.
+    Год берём от предыдущей (более новой) строки и уменьшаем на один, когда дата с ним оказывается
+    позже неё — например, после января идёт декабрь.
+    :param date: дата строки 'YYYY-MM-DD' от convert_date_format
+    :param previous: дата предыдущей принятой строки или None
+    :return: (дата с исправленным годом или None, если строка не старше предыдущей; был ли переход года)
+    """
+    if previous is None or date <= previous:
+        return date, False
+    newer = date_cls.fromisoformat(previous)
+    month, day = int(date[5:7]), int(date[8:10])
+    year = newer.year
+    while True:
+        try:
+            candidate = date_cls(year, month, day)
+        except ValueError:  # 29 февраля в невисокосном году
+            year -= 1
+            continue
+        if candidate <= newer:
+            return candidate.isoformat(), candidate.year < newer.year
+        if (candidate - newer).days < YEAR_WRAP_MIN_DAYS:
+            return None, False
+        year -= 1
+
 def clean_value(value):
     """Очищает значение от лишних символов"""
     if not value:
@@ -72,17 +144,15 @@ def clean_value(value):
 def get_coins_from_db():
     """Получает список монет из БД"""
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT DISTINCT project_symbol, project_url 
-            FROM cryptorank_upcoming 
-            WHERE project_symbol IS NOT NULL 
-              AND project_url LIKE '%/ico/%'
-            ORDER BY project_symbol
-        """)
-        rows = cursor.fetchall()
-        conn.close()
+        with db_connection() as conn, conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT DISTINCT project_symbol, project_url 
+                FROM cryptorank_upcoming 
+                WHERE project_symbol IS NOT NULL 
+                  AND project_url LIKE '%/ico/%'
+                ORDER BY project_symbol
+            """)
+            rows = cursor.fetchall()
         coins = []
         for symbol, url in rows:
             slug = url.split('/ico/')[-1].split('?')[0]
@@ -94,133 +164,138 @@ def get_coins_from_db():
         print(f"❌ Ошибка подключения к БД: {e}")
         return []
 
-def create_table_if_not_exists(symbol):
-    """Создаёт таблицу ohlc_<symbol>, если её нет"""
-    conn = None
-    cursor = None
-    table_name = f"ohlc_{symbol.lower()}"
+def ensure_ohlc_schema(conn=None):
+    """Создаёт секционированную таблицу ohlc и переносит в неё старые таблицы ohlc_<symbol>"""
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        cursor = conn.cursor()
-        cursor.execute(f"""
-            CREATE TABLE IF NOT EXISTS {table_name} (
-                id SERIAL PRIMARY KEY,
-                date DATE NOT NULL,
-                open_price NUMERIC(20,10),
-                high_price NUMERIC(20,10),
-                low_price NUMERIC(20,10),
-                med_price NUMERIC(20,10),
-                close_price NUMERIC(20,10),
-                change_percent NUMERIC(10,6),
-                volume_usd NUMERIC(30,10),
-                change_volume_percent NUMERIC(10,6),
-                market_cap NUMERIC(30,10),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE (date)
-            );
-        """)
-        conn.commit()
-        print(f"✅ Таблица {table_name} готова")
+        with db_connection(conn) as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(OHLC_SCHEMA_SQL.read_text(encoding='utf-8'))
+            conn.commit()
+        print("✅ Таблица ohlc готова")
     except Exception as e:
-        print(f"❌ Ошибка создания таблицы {table_name}: {e}")
-    finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
-
-def parse_historical_data(driver, symbol, base_url):
-    """Парсинг исторических данных"""
-    print(f"🔍 Парсим историю: {symbol}")
-    print(f"🌐 URL: {base_url}")
+        print(f"❌ Ошибка подготовки таблицы ohlc: {e}")
 
+def get_watermark(symbol, conn=None):
+    """Последняя сохранённая дата монеты (строка 'YYYY-MM-DD') или None, если истории ещё нет"""
     try:
-        driver.set_page_load_timeout(30)
-        driver.get(base_url)
-        time.sleep(3)
+        with db_connection(conn) as conn:
+            with conn.cursor() as cursor:
+                # max(date) по первичному ключу (symbol, date) — один переход по индексу
+                cursor.execute("SELECT max(date) FROM ohlc WHERE symbol = %s", (symbol.upper(),))
+                watermark = cursor.fetchone()[0]
+            conn.commit()
+        return watermark.isoformat() if watermark else None
+    except Exception as e:
+        print(f"⚠️ Не удалось получить последнюю дату {symbol}: {e}")
+        return None
 
-        # Ждём таблицу
-        try:
-            WebDriverWait(driver, 15).until(
-                EC.presence_of_element_located((By.TAG_NAME, "table"))
-            )
-            print("   ✅ Таблица найдена → страница существует")
-        except:
-            print(f"   ❌ Не найдено таблицы → возможно, монета не существует или данные не загружены")
-            return []
+def iter_table_cells(table):
+    """Тексты ячеек строк таблицы, кроме заголовка; строки читаются по мере перебора"""
+    if SNAPSHOT_MODE:
+        # Один запрос outerHTML вместо запроса на каждую ячейку
+        for row in element_snapshot(table).xpath(".//tr")[1:]:
+            yield [node_text(cell) for cell in row.xpath("./td")]
+        return
+    for row in table.find_elements(By.TAG_NAME, "tr")[1:]:
+        yield [cell.text for cell in row.find_elements(By.TAG_NAME, "td")]
 
-        # Парсим таблицу
-        table = driver.find_element(By.TAG_NAME, "table")
-        rows = table.find_elements(By.TAG_NAME, "tr")[1:]
-        if len(rows) == 0:
-            print("   ⚠️ Таблица пустая")
-            return []
+def open_history_table(driver, base_url):
+    """Открывает страницу истории и возвращает таблицу или None, если данных нет"""
+    driver.set_page_load_timeout(30)
+    driver.get(base_url)
 
-        print(f"   📊 Найдено строк: {len(rows)}")
+    # Ждём первую строку с данными, а не фиксированную паузу
+    if wait_for(driver, (By.CSS_SELECTOR, "table tr td"), stage='historical.table') is None:
+        print(f"   ❌ Не найдено таблицы → возможно, монета не существует или данные не загружены")
+        return None
+    print("   ✅ Таблица найдена → страница существует")
+    return driver.find_element(By.TAG_NAME, "table")
 
-        parsed_data = []
-        headers = [
-            "Date", "Open", "High", "Low", "Med", "Close",
-            "Change", "Volume", "Change Volume", "Market Cap"
-        ]
+def extract_numeric(text):
+    """'$1,234.5' / '-2.3%' → float"""
+    if not text:
+        return None
+    try:
+        return float(text.replace('$', '').replace(',', '').replace('%', '').strip())
+    except:
+        return None
 
-        for row in rows:
-            try:
-                cells = row.find_elements(By.TAG_NAME, "td")
-                if len(cells) < 6:
-                    continue
+def parse_row(cells, today=None):
+    """Ячейки строки таблицы → dict с колонками OHLC_COLUMNS или None для заголовка и битых строк"""
+    try:
+        if len(cells) < 6:
+            return None
 
-                row_data = {}
-                for i, header in enumerate(headers):
-                    if i < len(cells):
-                        cell_text = clean_value(cells[i].text)
-                        row_data[header] = cell_text
+        row_data = {}
+        for i, header in enumerate(TABLE_HEADERS):
+            if i < len(cells):
+                row_data[header] = clean_value(cells[i])
 
-                raw_date = row_data.get("Date")
-                date = convert_date_format(raw_date)
-                if not date:
-                    print(f"   ⚠️ Пропущена строка: некорректная дата '{raw_date}'")
-                    continue
+        raw_date = row_data.get("Date")
+        date = convert_date_format(raw_date, today)
+        if not date:
+            print(f"   ⚠️ Пропущена строка: некорректная дата '{raw_date}'")
+            return None
 
-                # Преобразуем значения
-                def extract_numeric(text):
-                    if not text:
-                        return None
-                    try:
-                        return float(text.replace('$', '').replace(',', '').replace('%', '').strip())
-                    except:
-                        return None
-
-                open_price = extract_numeric(row_data.get("Open"))
-                high_price = extract_numeric(row_data.get("High"))
-                low_price = extract_numeric(row_data.get("Low"))
-                med_price = extract_numeric(row_data.get("Med"))
-                close_price = extract_numeric(row_data.get("Close"))
-                change_percent = extract_numeric(row_data.get("Change"))
-                volume_usd = extract_numeric(row_data.get("Volume"))
-                change_volume_percent = extract_numeric(row_data.get("Change Volume"))
-                market_cap = extract_numeric(row_data.get("Market Cap"))
-
-                parsed_data.append({
-                    'date': date,
-                    'open_price': open_price,
-                    'high_price': high_price,
-                    'low_price': low_price,
-                    'med_price': med_price,
-                    'close_price': close_price,
-                    'change_percent': change_percent,
-                    'volume_usd': volume_usd,
-                    'change_volume_percent': change_volume_percent,
-                    'market_cap': market_cap
-                })
-
-                if len(parsed_data) == 1:
-                    print(f"   ✅ Пример данных: {parsed_data[0]}")
+        return {
+            'date': date,
+            'open_price': extract_numeric(row_data.get("Open")),
+            'high_price': extract_numeric(row_data.get("High")),
+            'low_price': extract_numeric(row_data.get("Low")),
+            'med_price': extract_numeric(row_data.get("Med")),
+            'close_price': extract_numeric(row_data.get("Close")),
+            'change_percent': extract_numeric(row_data.get("Change")),
+            'volume_usd': extract_numeric(row_data.get("Volume")),
+            'change_volume_percent': extract_numeric(row_data.get("Change Volume")),
+            'market_cap': extract_numeric(row_data.get("Market Cap"))
+        }
+    except Exception as e:
+        print(f"   ❌ Ошибка парсинга строки: {e}")
+        return None
 
-            except Exception as e:
-                print(f"   ❌ Ошибка парсинга строки: {e}")
+def parse_historical_data(driver, symbol, base_url, since=None):
+    """
+    Парсинг исторических данных.
+    :param since: последняя сохранённая дата 'YYYY-MM-DD'. Таблица идёт от новых дней к старым,
+                  поэтому чтение останавливается на первой строке старше since. Сам день since
+                  перечитывается: при прошлом запуске он мог быть ещё не закрыт.
+    После ошибки браузера арендованный драйвер пересоздаётся (DriverPool.restart).
+    """
+    print(f"🔍 Парсим историю: {symbol}")
+    print(f"🌐 URL: {base_url}")
+    if since:
+        print(f"   ⏩ Сохранено по {since}, читаем только новые дни")
+
+    try:
+        table = open_history_table(driver, base_url)
+        if table is None:
+            return []
+
+        parsed_data = []
+        rows_read = 0
+        today = date_cls.today()
+
+        for cells in iter_table_cells(table):
+            rows_read += 1
+            row = parse_row(cells, today)
+            if row is None:
+                continue
+            previous = parsed_data[-1]['date'] if parsed_data else None
+            row['date'], _ = align_year(row['date'], previous)
+            if row['date'] is None or row['date'] == previous:
                 continue
+            if since and row['date'] < since:
+                print(f"   ⏹️ Дошли до сохранённой истории ({row['date']})")
+                break
+            parsed_data.append(row)
+            if len(parsed_data) == 1:
+                print(f"   ✅ Пример данных: {parsed_data[0]}")
+
+        if rows_read == 0:
+            print("   ⚠️ Таблица пустая")
+            return []
 
+        print(f"   📊 Прочитано строк: {rows_read}")
         print(f"✅ Добавлено записей: {len(parsed_data)}")
         return parsed_data
 
@@ -232,97 +307,317 @@ def parse_historical_data(driver, symbol, base_url):
             print(f"   ❌ Страница не найдена (404)")
         else:
             print(f"   ❌ Неизвестная ошибка: {e}")
+        if isinstance(e, WebDriverException):
+            # Упавший или зависший браузер не должен вернуться в пул к следующей монете
+            get_pool().restart(driver)
         return []
 
-def save_to_db(symbol, data):
-    """Сохраняет данные в таблицу ohlc_<symbol>, не удаляя старые строки"""
+def rows_to_csv(data):
+    """Сериализует строки OHLC в CSV для COPY (None → пустое поле = NULL)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in data:
+        writer.writerow(['' if row.get(col) is None else row.get(col) for col in OHLC_COLUMNS])
+    buffer.seek(0)
+    return buffer
+
+def save_to_db(symbol, data, conn=None):
+    """
+    Сохраняет данные монеты в таблицу ohlc, не удаляя старые строки.
+    Строки загружаются одним COPY во временную таблицу и сливаются одним INSERT ... ON CONFLICT.
+    :return: число записанных строк или None при ошибке
+    """
     if not data:
-        return
+        return 0
 
-    table_name = f"ohlc_{symbol.lower()}"
-    conn = None
-    cursor = None
+    symbol = symbol.upper()
+    columns = ", ".join(OHLC_COLUMNS)
 
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        cursor = conn.cursor()
-
-        # Вставка данных (или обновление при конфликте по дате)
-        insert_query = f"""
-            INSERT INTO {table_name} (
-                date, open_price, high_price, low_price, med_price,
-                close_price, change_percent, volume_usd, change_volume_percent, market_cap
-            ) VALUES (
-                %(date)s, %(open_price)s, %(high_price)s, %(low_price)s, %(med_price)s,
-                %(close_price)s, %(change_percent)s, %(volume_usd)s, %(change_volume_percent)s, %(market_cap)s
+        with db_connection(conn) as db, db.cursor() as cursor:
+            cursor.execute("""
+                CREATE TEMP TABLE IF NOT EXISTS ohlc_staging (
+                    date DATE,
+                    open_price NUMERIC,
+                    high_price NUMERIC,
+                    low_price NUMERIC,
+                    med_price NUMERIC,
+                    close_price NUMERIC,
+                    change_percent NUMERIC,
+                    volume_usd NUMERIC,
+                    change_volume_percent NUMERIC,
+                    market_cap NUMERIC
+                ) ON COMMIT DELETE ROWS;
+            """)
+            cursor.copy_expert(
+                f"COPY ohlc_staging ({columns}) FROM STDIN WITH (FORMAT csv)",
+                rows_to_csv(data)
             )
-            ON CONFLICT (date) DO UPDATE SET
-                open_price = EXCLUDED.open_price,
-                high_price = EXCLUDED.high_price,
-                low_price = EXCLUDED.low_price,
-                med_price = EXCLUDED.med_price,
-                close_price = EXCLUDED.close_price,
-                change_percent = EXCLUDED.change_percent,
-                volume_usd = EXCLUDED.volume_usd,
-                change_volume_percent = EXCLUDED.change_volume_percent,
-                market_cap = EXCLUDED.market_cap,
-                created_at = CURRENT_TIMESTAMP;
-        """
-
-        for row in data:
-            cursor.execute(insert_query, row)
 
+            # Слияние (или обновление при конфликте по дате); DISTINCT ON — на случай повторов даты в выборке
+            cursor.execute(f"""
+                INSERT INTO ohlc (symbol, {columns})
+                SELECT DISTINCT ON (date) %s, {columns}
+                FROM ohlc_staging
+                ORDER BY date
+                ON CONFLICT (symbol, date) DO UPDATE SET
+                    open_price = EXCLUDED.open_price,
+                    high_price = EXCLUDED.high_price,
+                    low_price = EXCLUDED.low_price,
+                    med_price = EXCLUDED.med_price,
+                    close_price = EXCLUDED.close_price,
+                    change_percent = EXCLUDED.change_percent,
+                    volume_usd = EXCLUDED.volume_usd,
+                    change_volume_percent = EXCLUDED.change_volume_percent,
+                    market_cap = EXCLUDED.market_cap,
+                    created_at = CURRENT_TIMESTAMP;
+            """, (symbol,))
+            affected = cursor.rowcount
+            db.commit()
+        bump_version(OHLC)
+        print(f"✅ Данные {symbol} сохранены в ohlc: {affected} строк")
+        return affected
+
+    except Exception as e:
+        print(f"❌ Ошибка сохранения в БД: {e}")
+        return None
+
+def refresh_indicators(symbol, since, conn=None):
+    """
+    Пересчёт индикаторов монеты после сохранения истории, начиная с since — самого раннего записанного дня.
+    Вызывается отдельно от save_to_db: ошибка индикаторов не делает сохранённые строки OHLC несохранёнными.
+    """
+    if update_indicators(symbol, since=since, conn=conn):
+        bump_version(OHLC)
+
+def scrape_coin(symbol, url, conn=None):
+    """
+    Парсит и сохраняет историю одной монеты — только дни новее последней сохранённой даты.
+    Драйвер берётся из общего пула, который сам пересоздаёт его каждые DRIVER_MAX_PAGES монет.
+    :return: число сохранённых строк или None, если монета уже актуальна и страница не открывалась
+    """
+    since = get_watermark(symbol, conn) if INCREMENTAL else None
+    if since and since >= date_cls.today().isoformat():
+        print(f"   ✅ {symbol}: данные уже за сегодня ({since}), пропускаем")
+        return None
+
+    with get_pool().lease(implicit_wait=10) as driver:
+        data = parse_historical_data(driver, symbol, url, since)
+
+    if data:
+        if save_to_db(symbol, data, conn) is not None:
+            refresh_indicators(symbol, min(row['date'] for row in data), conn)
+    else:
+        print(f"   ⚠️ Пропущена монета: {symbol} (нет данных или страница не найдена)")
+    return len(data)
+
+def get_backfill_state(symbol, conn=None):
+    """
+    Состояние глубокой догрузки монеты: (самая старая сохранённая дата или None, пройдена ли история до конца).
+    Самая старая дата берётся из ohlc: догрузка идёт от новых дней к старым и коммитит пачками,
+    поэтому всё новее неё уже сохранено и после сбоя продолжаем с этой границы.
+    """
+    symbol = symbol.upper()
+    with db_connection(conn) as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT min(date) FROM ohlc WHERE symbol = %s", (symbol,))
+            oldest = cursor.fetchone()[0]
+            cursor.execute("SELECT completed FROM ohlc_backfill WHERE symbol = %s", (symbol,))
+            state = cursor.fetchone()
+        conn.commit()
+    return (oldest.isoformat() if oldest else None), bool(state and state[0])
+
+def set_backfill_state(symbol, oldest_date, completed, conn=None):
+    """Запоминает границу догрузки и признак, что история пройдена до конца"""
+    with db_connection(conn) as conn:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                INSERT INTO ohlc_backfill (symbol, oldest_date, completed, updated_at)
+                VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
+                ON CONFLICT (symbol) DO UPDATE SET
+                    oldest_date = LEAST(ohlc_backfill.oldest_date, EXCLUDED.oldest_date),
+                    completed = EXCLUDED.completed,
+                    updated_at = CURRENT_TIMESTAMP;
+            """, (symbol.upper(), oldest_date, completed))
         conn.commit()
-        print(f"✅ Данные сохранены в {table_name}")
 
-        # ❌ УДАЛЕНО: больше не удаляем старые строки
+def find_load_more_button(driver):
+    """Кнопка «Load more» / «Показать ещё» под таблицей, если история догружается ею"""
+    buttons = driver.find_elements(By.XPATH,
+                                   "//table/following::button[contains(., 'Load more') or contains(., 'Show more')"
+                                   " or contains(., 'Показать ещё') or contains(., 'Загрузить ещё')]")
+    for button in buttons:
+        if button.is_displayed() and button.is_enabled() and not button.get_attribute('disabled'):
+            return button
+    return None
+
+def load_more_rows(driver):
+    """
+    Догружает следующую порцию истории: кнопкой «Load more», кнопкой следующей страницы или прокруткой.
+    :return: 'append' — строки добавились в конец таблицы, 'page' — таблица заменена следующей страницей,
+             None — история закончилась
+    """
+    row_count, first_row = driver.execute_script(TABLE_STATE_JS)
+    table = driver.find_element(By.TAG_NAME, "table")
+    button = find_load_more_button(driver) or find_next_page_button(table)
+    if button is not None:
+        driver.execute_script("arguments[0].click();", button)
+    else:
+        driver.execute_script("arguments[0].scrollIntoView({block: 'end'});"
+                              "window.scrollTo(0, document.body.scrollHeight);", table)
+
+    def changed(d):
+        count, first = d.execute_script(TABLE_STATE_JS)
+        return count > row_count or (first and first != first_row)
+
+    try:
+        WebDriverWait(driver, 15, poll_frequency=0.2).until(changed)
+    except TimeoutException:
+        return None
+    wait_for_dom_stable(driver, stage='historical.backfill_page', quiet=0.3)
+    _, first = driver.execute_script(TABLE_STATE_JS)
+    return 'append' if first == first_row else 'page'
+
+def backfill_coin(symbol, url, conn=None, restart=False):
+    """
+    Глубокая догрузка всей истории монеты: листает таблицу до самого старого дня,
+    записывая строки в БД пачками по BACKFILL_CHUNK_SIZE по мере чтения.
+    В памяти — только текущая пачка; из браузера читаются лишь новые строки таблицы.
+    :param conn: соединение для записи; по умолчанию каждая пачка берёт соединение из общего пула,
+                 чтобы не держать его, пока браузер листает страницы
+    :param restart: пройти историю заново, не пропуская уже сохранённые дни
+    :return: число записанных строк или None, если история монеты уже пройдена
+    """
+    frontier, completed = get_backfill_state(symbol, conn)
+    if completed and not restart:
+        print(f"   ✅ {symbol}: история уже догружена до {frontier}, пропускаем")
+        return None
+    if restart:
+        frontier = None
+    elif frontier:
+        print(f"   ⏩ {symbol}: сохранено начиная с {frontier}, догружаем более старые дни")
+
+    saved = 0
+    chunk = []
+    # Самый старый записанный день: индикаторы пересчитываются с него один раз, после всех пачек
+    inserted_oldest = None
+    today = date_cls.today()
+
+    def flush():
+        nonlocal saved, chunk, inserted_oldest
+        written = save_to_db(symbol, chunk, conn)
+        if written is None:
+            raise RuntimeError(f"пачка до {chunk[-1]['date']} не сохранена")
+        inserted_oldest = chunk[-1]['date']
+        set_backfill_state(symbol, inserted_oldest, False, conn)
+        saved += written
+        chunk = []
+
+    try:
+        with get_pool().lease(implicit_wait=10) as driver:
+            if open_history_table(driver, url) is None:
+                return 0
+
+            offset = 0
+            oldest_seen = None
+            finished = False
+            # Отброшенные строки и переход года на последней строке: история могла быть прочитана не вся
+            dropped = 0
+            wrapped = False
+            for page in range(1, BACKFILL_MAX_PAGES + 1):
+                for cells in driver.execute_script(ROWS_AFTER_JS, offset):
+                    offset += 1
+                    row = parse_row([' '.join((cell or '').split()) for cell in cells], today)
+                    if row is None:
+                        continue
+                    # Таблица идёт от новых дней к старым: всё, что не старше уже увиденного, — повтор
+                    row['date'], row_wrapped = align_year(row['date'], oldest_seen)
+                    if row['date'] is None or row['date'] == oldest_seen:
+                        dropped += 1
+                        continue
+                    oldest_seen = row['date']
+                    wrapped = row_wrapped
+                    if frontier and row['date'] >= frontier:
+                        continue
+                    chunk.append(row)
+                    if len(chunk) >= BACKFILL_CHUNK_SIZE:
+                        flush()
+
+                print(f"   📄 Страница {page}: прочитано до {oldest_seen}, сохранено {saved + len(chunk)}")
+                mode = load_more_rows(driver)
+                if mode is None:
+                    finished = True
+                    break
+                if mode == 'page':
+                    offset = 0
+                time.sleep(BACKFILL_PAGE_DELAY)
+
+        if chunk:
+            flush()
+    finally:
+        # И после сбоя: записанные пачки уже в ohlc, а следующий инкрементальный прогон их не пересчитает
+        if inserted_oldest:
+            refresh_indicators(symbol, inserted_oldest, conn)
+
+    if finished and (dropped or wrapped):
+        # Граница догрузки сохранена пачками; следующий запуск пройдёт историю дальше неё
+        reason = f"отброшено строк не по порядку: {dropped}" if dropped else "последняя строка — переход года"
+        print(f"⚠️ {symbol}: таблица закончилась на {oldest_seen}, но {reason}; монета не отмечена догруженной")
+    elif finished:
+        set_backfill_state(symbol, oldest_seen, True, conn)
+        print(f"✅ {symbol}: история догружена до {oldest_seen}, записано строк: {saved}")
+    else:
+        print(f"⚠️ {symbol}: достигнут предел {BACKFILL_MAX_PAGES} страниц, продолжим со следующего запуска")
+    return saved
+
+def backfill(symbols=None, restart=False):
+    """Глубокая догрузка истории для всех монет из БД (или только symbols)"""
+    try:
+        coins = get_coins_from_db()
+        if symbols:
+            wanted = {symbol.upper() for symbol in symbols}
+            coins = [(symbol, url) for symbol, url in coins if symbol.upper() in wanted]
+        if not coins:
+            print("❌ Нет монет для догрузки")
+            return
+
+        ensure_ohlc_schema()
+
+        for i, (symbol, url) in enumerate(coins):
+            print(f"\n🔄 [{i+1}/{len(coins)}] Догрузка истории: {symbol}")
+            try:
+                backfill_coin(symbol, url, restart=restart)
+            except Exception as e:
+                # Сохранённые пачки остаются в БД — следующий запуск продолжит с них
+                print(f"   ❌ Догрузка {symbol} прервана: {e}")
 
     except Exception as e:
-        print(f"❌ Ошибка сохранения в БД: {e}")
-        if conn:
-            conn.rollback()
+        print(f"❌ Критическая ошибка: {e}")
     finally:
-        if cursor:
-            cursor.close()
-        if conn:
-            conn.close()
+        get_pool().report()
+        report_latencies()
 
 def main():
     """Главная функция — парсинг исторических данных для всех монет из БД"""
-    driver = None
     try:
         coins = get_coins_from_db()
         if not coins:
             print("❌ Нет монет для парсинга")
             return
 
-        for i, (symbol, url) in enumerate(coins):
-            # Перезапускаем драйвер каждые 10 монет
-            if i % 10 == 0 and driver:
-                driver.quit()
-                time.sleep(2)
-                driver = setup_driver()
-
-            if not driver:
-                driver = setup_driver()
+        ensure_ohlc_schema()
 
+        for i, (symbol, url) in enumerate(coins):
             print(f"\n🔄 [{i+1}/{len(coins)}] Парсим: {symbol}")
-            create_table_if_not_exists(symbol)
-            data = parse_historical_data(driver, symbol, url)
-
-            if data:
-                save_to_db(symbol, data)
-            else:
-                print(f"   ⚠️ Пропущена монета: {symbol} (нет данных или страница не найдена)")
-
-            time.sleep(3)  # Антибан
+            # Соединения берутся из общего пула на время запроса и не держатся, пока грузится страница
+            if scrape_coin(symbol, url) is not None:
+                time.sleep(3)  # Антибан
 
     except Exception as e:
         print(f"❌ Критическая ошибка: {e}")
     finally:
-        if driver:
-            driver.quit()
-        print("🔒 Браузер закрыт")
+        get_pool().report()
+        report_latencies()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
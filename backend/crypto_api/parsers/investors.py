@@ -1,17 +1,21 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 import json
-import time
 import os
+import threading
 import psycopg2
-from psycopg2.extras import Json
-from selenium import webdriver
+from psycopg2.extras import Json, execute_values
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
 from datetime import datetime
 
+from crypto_api.cache import COINS, bump_version
+from crypto_api.parsers.db_pool import db_connection
+from crypto_api.parsers.dom import SNAPSHOT_MODE, element_snapshot, first_href, node_lines, node_text
+from crypto_api.parsers.paging import find_next_page_button
+from crypto_api.parsers.project_page import CONCURRENCY, Extractor, run_extractors
+from crypto_api.parsers.readiness import wait_for
+
 # 🔥 УСТАНАВЛИВАЕМ ПУТЬ ДЛЯ SELENIUM
 os.environ['SELENIUM_CACHE_PATH'] = '/app/.cache/selenium'
 os.makedirs('/app/.cache/selenium', exist_ok=True)
@@ -24,71 +28,121 @@ try:
 except ImportError:
     print("⚠️ python-dotenv не установлен, используются системные переменные")
 
-# Настройки БД из .env файла
-DB_CONFIG = {
-    'host': os.environ.get('DB_HOST', 'localhost'),
-    'port': os.environ.get('DB_PORT', '5432'),
-    'database': os.environ.get('DB_NAME', 'crypto_db'),
-    'user': os.environ.get('DB_USER', 'crypto_user'),
-    'password': os.environ.get('DB_PASSWORD', 'crypto_password')
-}
+# Сколько проектов копится в буфере до записи в БД
+BATCH_SIZE = int(os.environ.get('INVESTORS_BATCH_SIZE', '10'))
+
+class InvestorsWriter:
+    """
+    Буферизованная запись инвесторов.
+    Проекты копятся в буфере и пишутся пачкой в одной транзакции на одном соединении из общего пула: JSONB-столбец
+    cryptorank_upcoming.investors одним UPDATE ... FROM (VALUES ...) и нормализованная
+    таблица project_investors — удаление старых строк пачки и один многострочный INSERT.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE):
+        self.batch_size = batch_size
+        self._buffer = {}
+        self._lock = threading.Lock()
+
+    def add(self, project_id, investors_list):
+        """
+        Добавляет инвесторов проекта в буфер; при заполнении буфера пишет пачку.
+        Если запись не удалась, пачка остаётся в буфере и повторяется при следующей записи.
+        """
+        with self._lock:
+            self._buffer[project_id] = investors_list or []
+            if len(self._buffer) >= self.batch_size:
+                try:
+                    self._flush_locked()
+                except Exception:
+                    print(f"   ⚠️ Пачка инвесторов оставлена в буфере до следующей записи: проектов {len(self._buffer)}")
+
+    def flush(self):
+        """Записывает всё накопленное; при ошибке записи буфер сохраняется, а ошибка пробрасывается"""
+        with self._lock:
+            self._flush_locked()
+
+    @staticmethod
+    def _normalized_rows(project_id, investors_list):
+        """Строки project_investors без повторов (тот же ключ, что в remove_duplicates)"""
+        seen = set()
+        rows = []
+        for inv in investors_list:
+            name = (inv.get('investor_name') or '').strip()
+            href = (inv.get('investor_href') or '').strip()
+            key = (name.lower(), href)
+            if not name or key in seen:
+                continue
+            seen.add(key)
+            rows.append((
+                project_id, name,
+                inv.get('investor_role') or None,
+                inv.get('investor_tier') or None,
+                inv.get('investor_type') or None,
+                inv.get('investor_stage') or None,
+                href or None
+            ))
+        return rows
+
+    def _flush_locked(self):
+        if not self._buffer:
+            return
+        # Буфер очищается только после коммита: упавшая пачка не теряется
+        batch = self._buffer
+        try:
+            with db_connection() as connection, connection.cursor() as cursor:
+                execute_values(cursor, """
+                    UPDATE cryptorank_upcoming AS u
+                    SET investors = batch.investors
+                    FROM (VALUES %s) AS batch (id, investors)
+                    WHERE u.id = batch.id
+                """, [(project_id, Json(investors_list)) for project_id, investors_list in batch.items()],
+                    template="(%s, %s::jsonb)", page_size=len(batch))
+                cursor.execute("DELETE FROM project_investors WHERE project_id = ANY(%s)", (list(batch),))
+                rows = [row for project_id, investors_list in batch.items()
+                        for row in self._normalized_rows(project_id, investors_list)]
+                if rows:
+                    execute_values(cursor, """
+                        INSERT INTO project_investors (project_id, investor, role, tier, type, stage, href)
+                        VALUES %s
+                    """, rows, page_size=len(rows))
+                connection.commit()
+        except psycopg2.Error as db_err:
+            print(f"   ❌ Ошибка БД при обновлении инвесторов: {db_err}")
+            raise
+        except Exception as e:
+            print(f"   ❌ Непредвиденная ошибка: {e}")
+            raise
+        self._buffer = {}
+        bump_version(COINS)
+        print(f"   ✅ Инвесторы сохранены в БД: проектов {len(batch)}, строк {len(rows)}")
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def get_writer():
+    """Общий для процесса InvestorsWriter"""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = InvestorsWriter()
+        return _writer
 
 def update_project_investors_in_db(project_id, investors_list):
     """
-    Обновляет столбец 'investors' в таблице 'cryptorank_upcoming' для заданного project_id.
+    Ставит инвесторов проекта в буфер общего InvestorsWriter и сразу записывает буфер
+    вместе с проектами, накопленными другими вызовами. Если запись не удалась,
+    проекты остаются в буфере, а ошибка пробрасывается.
     :param project_id: ID проекта в БД.
     :param investors_list: Список словарей с информацией об инвесторах.
     """
-    connection = None
-    try:
-        connection = psycopg2.connect(**DB_CONFIG)
-        cursor = connection.cursor()
-        if not investors_list:
-            investors_data = Json([])
-        else:
-            investors_data = Json(investors_list)
-        update_query = """
-            UPDATE cryptorank_upcoming 
-            SET investors = %s 
-            WHERE id = %s;
-        """
-        cursor.execute(update_query, (investors_data, project_id))
-        connection.commit()
-        print(f"   ✅ Данные об инвесторах для project_id={project_id} успешно обновлены в БД.")
-    except psycopg2.Error as db_err:
-        print(f"   ❌ Ошибка БД при обновлении инвесторов: {db_err}")
-        if connection:
-            connection.rollback()
-    except Exception as e:
-        print(f"   ❌ Непредвиденная ошибка: {e}")
-        if connection:
-            connection.rollback()
-    finally:
-        if connection:
-            cursor.close()
-            connection.close()
-            print("   🔒 Соединение с БД закрыто.")
-
-def setup_driver():
-    """Настройка браузера"""
-    print("🔧 Запуск браузера...")
-    options = webdriver.ChromeOptions()
-    options.add_argument('--headless=new')
-    options.add_argument('--no-sandbox')
-    options.add_argument('--disable-dev-shm-usage')
-    options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
-    options.add_argument('--window-size=1920,1080')
-    options.add_argument('--disable-blink-features=AutomationControlled')
-    driver = webdriver.Chrome(options=options)
-    driver.implicitly_wait(5)
-    print("   ✅ Браузер готов")
-    return driver
+    writer = get_writer()
+    writer.add(project_id, investors_list)
+    writer.flush()
 
 def get_projects_from_db(limit=20):
     """Получаем проекты из БД"""
     try:
-        connection = psycopg2.connect(**DB_CONFIG)
-        cursor = connection.cursor()
         query = """
         SELECT id, project_name, project_symbol, project_url 
         FROM cryptorank_upcoming 
@@ -97,9 +151,9 @@ def get_projects_from_db(limit=20):
         ORDER BY id 
         LIMIT %s
         """
-        cursor.execute(query, (limit,))
-        projects = cursor.fetchall()
-        connection.close()
+        with db_connection() as connection, connection.cursor() as cursor:
+            cursor.execute(query, (limit,))
+            projects = cursor.fetchall()
         print(f"📊 Получено проектов из БД: {len(projects)}")
         return [{'id': row[0], 'name': row[1], 'symbol': row[2], 'url': row[3].strip()} for row in projects if row[3].strip()]
     except Exception as e:
@@ -109,27 +163,31 @@ def get_projects_from_db(limit=20):
 def find_investors_table(driver):
     """Находит таблицу инвесторов"""
     try:
-        header = WebDriverWait(driver, 15).until(
-            EC.presence_of_element_located((
-                By.XPATH,
-                "//h2[contains(text(), 'Investors and Backers') or contains(text(), 'Investors & Backers')]"
-            ))
-        )
+        header = wait_for(driver, (
+            By.XPATH,
+            "//h2[contains(text(), 'Investors and Backers') or contains(text(), 'Investors & Backers')]"
+        ), stage='investors.header')
+        if header is None:
+            print("   ⏳ Таймаут: Заголовок 'Investors and Backers' не найден.")
+            return None
         print(f"   📍 Заголовок 'Investors and Backers' найден: '{header.text.strip()}'")
         table = header.find_element(By.XPATH, "./following::table[1]")
         if table:
             print(f"   📊 Таблица инвесторов найдена.")
             return table
         return None
-    except TimeoutException:
-        print("   ⏳ Таймаут: Заголовок 'Investors and Backers' не найден.")
-        return None
     except Exception as e:
         print(f"   ❌ Ошибка поиска таблицы: {e}")
         return None
 
 def get_page_content_hash(table):
     """Генерирует хэш контента страницы"""
+    if SNAPSHOT_MODE:
+        try:
+            return content_hash_from_snapshot(element_snapshot(table))
+        except Exception as e:
+            print(f"   ⚠️ Ошибка хэширования контента: {e}")
+            return None
     try:
         rows = table.find_elements(By.XPATH, ".//tbody/tr")
         page_text_parts = []
@@ -148,8 +206,55 @@ def get_page_content_hash(table):
         print(f"   ⚠️ Ошибка хэширования контента: {e}")
         return None
 
+def content_hash_from_snapshot(snapshot):
+    """Хэш контента таблицы по снимку DOM"""
+    page_text_parts = []
+    for row in snapshot.xpath(".//tbody/tr"):
+        cells = [node_text(cell) for cell in row.xpath("./td")[:4]]
+        name_text, tier_text, type_text, stage_text = (cells + [""] * 4)[:4]
+        row_text = f"{name_text}|{tier_text}|{type_text}|{stage_text}"
+        if row_text and not (name_text.isdigit() and len(name_text) < 3 and not tier_text):
+            page_text_parts.append(row_text)
+    content = " || ".join(sorted(page_text_parts))
+    return hash(content)
+
+def collect_investors_from_snapshot(snapshot, project_info):
+    """Собирает инвесторов из снимка таблицы без обращений к WebDriver"""
+    investors = []
+    rows = snapshot.xpath(".//tbody/tr")
+    print(f"   📊 Найдено строк в таблице: {len(rows)}")
+    for i, row in enumerate(rows):
+        try:
+            cells = row.xpath("./td")
+            if len(cells) < 3:
+                continue
+            parts = node_lines(cells[0])
+            investor = {
+                'project_id': project_info['id'],
+                'project_name': project_info['name'],
+                'project_url': project_info['url'],
+                'investor_name': parts[0] if parts else "",
+                'investor_role': parts[1] if len(parts) > 1 else "",
+                'investor_tier': node_text(cells[1]),
+                'investor_type': node_text(cells[2]),
+                'investor_stage': node_text(cells[3]) if len(cells) > 3 else "",
+                'investor_href': first_href(cells[0], ('/funds/', '/investors/', '/companies/'))
+            }
+            investors.append(investor)
+        except Exception as e:
+            print(f"   ⚠️ Ошибка обработки строки {i + 1}: {e}")
+            continue
+    print(f"   ✅ Собрано {len(investors)} инвесторов со страницы.")
+    return investors
+
 def collect_investors_from_table(table, project_info):
     """Собирает инвесторов из таблицы"""
+    if SNAPSHOT_MODE:
+        try:
+            return collect_investors_from_snapshot(element_snapshot(table, project_info['url']), project_info)
+        except Exception as e:
+            print(f"   ❌ Ошибка сбора инвесторов: {e}")
+            return []
     investors = []
     try:
         rows = table.find_elements(By.XPATH, ".//tbody/tr")
@@ -196,115 +301,6 @@ def collect_investors_from_table(table, project_info):
     print(f"   ✅ Собрано {len(investors)} инвесторов со страницы.")
     return investors
 
-def find_next_page_button(table):
-    """Ищет кнопку 'Next'"""
-    try:
-        # Поиск контейнера пагинации
-        pagination_container = None
-        try:
-            elements_after_table = table.find_elements(By.XPATH, "./following::*")
-            for elem in elements_after_table:
-                elem_classes = (elem.get_attribute('class') or '').lower()
-                if 'pagination' in elem_classes or 'sc-' in elem_classes or \
-                        elem.find_elements(By.XPATH, ".//button[@aria-label='Next page']"):
-                    pagination_container = elem
-                    break
-                if len(elements_after_table) > 20:
-                    break
-        except Exception as e:
-            print(f"   ⚠️ Ошибка поиска пагинации: {e}")
-
-        if not pagination_container:
-            try:
-                pagination_container = table.find_element(By.XPATH, "./following-sibling::*[1]")
-            except:
-                pass
-
-        if not pagination_container:
-            try:
-                parent = table.find_element(By.XPATH, "..")
-                pagination_containers = parent.find_elements(By.XPATH,
-                                                             "./*[contains(@class, 'pagination') or contains(@class, 'styles_pagination')]")
-                if pagination_containers:
-                    pagination_container = pagination_containers[0]
-            except Exception as e_inner:
-                print(f"   ⚠️ Ошибка поиска пагинации: {e_inner}")
-
-        if not pagination_container:
-            print("   ⚠️ Контейнер пагинации не найден.")
-            return None
-
-        # Поиск кнопки "Next"
-        try:
-            next_button = pagination_container.find_element(By.XPATH,
-                                                            ".//button[@aria-label='Next page' and not(@disabled)]")
-            if next_button.is_displayed() and next_button.is_enabled():
-                print(f"   🎯 Найдена кнопка Next по aria-label")
-                return next_button
-        except:
-            pass
-
-        try:
-            svg_next_buttons = pagination_container.find_elements(By.XPATH,
-                                                                  ".//button[not(@disabled)]//svg//path[contains(@d, 'M6.994 5.002')]")
-            for svg_path in svg_next_buttons:
-                try:
-                    button = svg_path.find_element(By.XPATH, "./ancestor::button[1]")
-                    if button.is_displayed() and button.is_enabled() and not button.get_attribute('disabled'):
-                        print(f"   🎯 Найдена кнопка Next по SVG")
-                        return button
-                except:
-                    continue
-        except Exception as e_svg:
-            print(f"   ⚠️ Ошибка поиска кнопки Next по SVG: {e_svg}")
-
-        try:
-            page_buttons = pagination_container.find_elements(By.XPATH,
-                                                              ".//button[contains(@class, 'styles_button__')]")
-            current_page = None
-            max_page = 0
-            page_elements = {}
-            for button in page_buttons:
-                try:
-                    if not button.is_displayed() or not button.is_enabled() or button.get_attribute('disabled'):
-                        continue
-                    span = button.find_element(By.XPATH, ".//span[contains(@class, 'styles_text__')]")
-                    text = span.text.strip()
-                    if text.isdigit():
-                        page_num = int(text)
-                        page_elements[page_num] = button
-                        max_page = max(max_page, page_num)
-                        classes = button.get_attribute('class') or ''
-                        if 'styles_selected__' in classes:
-                            current_page = page_num
-                except Exception as e_btn:
-                    continue
-
-            if current_page is not None:
-                if current_page < max_page:
-                    next_page = current_page + 1
-                    if next_page in page_elements:
-                        print(f"   ➡️ Переход на страницу {next_page}")
-                        return page_elements[next_page]
-                else:
-                    print(f"   ⏹️ Достигнута последняя страница ({current_page}).")
-                    return None
-            else:
-                if 2 in page_elements:
-                    page_1_button = page_elements.get(1)
-                    if page_1_button:
-                        classes_1 = page_1_button.get_attribute('class') or ''
-                        if 'styles_selected__' in classes_1:
-                            print(f"   ➡️ Переход на страницу 2")
-                            return page_elements[2]
-        except Exception as e_num:
-            print(f"   ⚠️ Ошибка поиска числовой пагинации: {e_num}")
-
-    except Exception as e:
-        print(f"   ⚠️ Ошибка поиска контейнера пагинации: {e}")
-    print("   ⏹️ Кнопка 'Next' не найдена.")
-    return None
-
 def process_investors_with_pagination(driver, project_info):
     """Обрабатывает пагинацию"""
     all_investors = []
@@ -348,7 +344,6 @@ def process_investors_with_pagination(driver, project_info):
 
         print(f"   🔽 Прокрутка к кнопке 'Next'...")
         driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", next_button)
-        time.sleep(1.5)
 
         print(f"   🖱️ Клик по кнопке 'Next'...")
         try:
@@ -358,12 +353,9 @@ def process_investors_with_pagination(driver, project_info):
             break
 
         print(f"   ⏳ Ожидание загрузки новой страницы...")
-        time.sleep(2.5)
-
-        try:
-            WebDriverWait(driver, 15).until(EC.staleness_of(table))
+        if wait_for(driver, table, stage='investors.next_page', condition=EC.staleness_of) is not None:
             print(f"   ✅ Старая таблица устарела.")
-        except TimeoutException:
+        else:
             print(f"   ⚠️ Старая таблица не устарела.")
             new_table = find_investors_table(driver)
             if new_table:
@@ -387,20 +379,12 @@ def process_investors_with_pagination(driver, project_info):
         print("-" * 40)
     return all_investors
 
-def scan_project_investors(driver, project_info):
-    """Сканирует инвесторов для одного проекта"""
+def extract_investors(page):
+    """Собирает инвесторов с уже загруженной страницы проекта"""
+    project_info = page.project
     try:
         print(f"\n🔍 СБОР ИНВЕСТОРОВ: {project_info['name']} ({project_info['symbol']})")
-        print(f"🌐 URL: {project_info['url']}")
-        driver.set_page_load_timeout(90)
-        driver.get(project_info['url'])
-        print("   ⏳ Страница загружена. Ожидание...")
-        time.sleep(6)
-        driver.execute_script("window.scrollTo(0, document.body.scrollHeight/3);")
-        time.sleep(2)
-        driver.execute_script("window.scrollTo(0, 0);")
-        time.sleep(1)
-        investors = process_investors_with_pagination(driver, project_info)
+        investors = process_investors_with_pagination(page.driver, project_info)
         print(f"\n   ✅ Завершено. Найдено инвесторов: {len(investors)}")
         if investors:
             print(f"   📋 Примеры (первые 5):")
@@ -529,10 +513,25 @@ def analyze_results(investors):
         if len(pdata['investors']) > 3:
             print(f"      ... и еще {len(pdata['investors']) - 3} инвесторов.")
 
-def main():
+def save_project_investors(project, investors):
+    """Ставит инвесторов проекта в очередь на пакетную запись"""
+    get_writer().add(project['id'], investors)
+
+def finish_investors(results):
+    """Запись остатка буфера, итоги по всем проектам: анализ и JSON"""
+    get_writer().flush()
+    all_investors = [inv for investors in results for inv in investors]
+    if all_investors:
+        print(f"\n{'=' * 20} ИТОГИ {'=' * 20}")
+        analyze_results(all_investors)
+        save_to_json(all_investors)
+    else:
+        print("\n😔 Не удалось собрать данные.")
+
+EXTRACTOR = Extractor('investors', extract_investors, save=save_project_investors, finish=finish_investors)
+
+def main(concurrency=CONCURRENCY):
     """Главная функция"""
-    driver = None
-    all_investors = []
     try:
         print("🚀 СТАРТ ПАРСИНГА ИНВЕСТОРОВ CRYPTORANK")
         print("=" * 50)
@@ -541,34 +540,10 @@ def main():
             print("❌ Не удалось получить список проектов.")
             return
         print(f"📋 Количество проектов для обработки: {len(projects)}")
-        driver = setup_driver()
-        for i, project in enumerate(projects, 1):
-            print(f"\n{'=' * 20} ПРОЕКТ {i}/{len(projects)} {'=' * 20}")
-            project_investors = scan_project_investors(driver, project)
-            if project_investors is not None:
-                update_project_investors_in_db(project['id'], project_investors)
-            all_investors.extend(project_investors)
-            if i < len(projects):
-                print(f"\n⏳ Пауза 3 секунды...")
-                time.sleep(3)
-        if all_investors:
-            print(f"\n{'=' * 20} ИТОГИ {'=' * 20}")
-            analyze_results(all_investors)
-            save_to_json(all_investors)
-        else:
-            print("\n😔 Не удалось собрать данные.")
+        run_extractors(projects, [EXTRACTOR], concurrency)
     except KeyboardInterrupt:
         print("\n⚠️ Прервано пользователем.")
     except Exception as e:
         print(f"\n💥 Критическая ошибка: {e}")
         import traceback
         traceback.print_exc()
-    finally:
-        if driver is not None:
-            try:
-                driver.quit()
-            except:
-                pass
-        # 🔥 Принудительное завершение процессов
-        os.system("killall -q chrome chromedriver 2>/dev/null || true")
-        print("\n🔒 Браузер закрыт (принудительно)")
\ No newline at end of file
@@ -1,13 +1,15 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 import json
-import time
 import os
-import psycopg2
-from selenium import webdriver
+from psycopg2.extras import execute_values
 from selenium.webdriver.common.by import By
 from datetime import datetime
 
+from crypto_api.cache import COINS, bump_version
+from crypto_api.parsers.db_pool import db_connection
+from crypto_api.parsers.project_page import Extractor, run_extractors
+
 # 🔥 УСТАНАВЛИВАЕМ ПУТЬ ДЛЯ SELENIUM
 os.environ['SELENIUM_CACHE_PATH'] = '/app/.cache/selenium'
 os.makedirs('/app/.cache/selenium', exist_ok=True)
@@ -20,41 +22,9 @@ try:
 except ImportError:
     print("⚠️ python-dotenv не установлен, используются системные переменные")
 
-# Настройки БД из .env файла
-DB_CONFIG = {
-    'host': os.environ.get('DB_HOST', 'localhost'),
-    'port': os.environ.get('DB_PORT', '5432'),
-    'database': os.environ.get('DB_NAME', 'crypto_db'),
-    'user': os.environ.get('DB_USER', 'crypto_user'),
-    'password': os.environ.get('DB_PASSWORD', 'crypto_password')
-}
-
-def setup_driver():
-    """Настройка браузера"""
-    print("🔧 Запуск браузера...")
-    options = webdriver.ChromeOptions()
-    options.add_argument('--headless=new')  # Убедитесь, что используется headless
-    options.add_argument('--no-sandbox')
-    options.add_argument('--disable-dev-shm-usage')
-    options.add_argument('--disable-images')
-    options.add_argument('--disable-gpu')
-    options.add_argument('--window-size=1920,1080')
-    options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
-    options.add_argument('--disable-blink-features=AutomationControlled')
-    options.add_argument('--no-first-run')
-    options.add_argument('--disable-extensions')
-    options.add_argument('--disable-features=TranslateUI')
-
-    driver = webdriver.Chrome(options=options)
-    driver.implicitly_wait(8)
-    print("   ✅ Браузер готов")
-    return driver
-
 def get_projects_from_db(limit=10):
     """Получаем проекты из БД"""
     try:
-        connection = psycopg2.connect(**DB_CONFIG)
-        cursor = connection.cursor()
         query = """
         SELECT id, project_name, project_symbol, project_url 
         FROM cryptorank_upcoming 
@@ -63,116 +33,78 @@ def get_projects_from_db(limit=10):
         ORDER BY id 
         LIMIT %s
         """
-        cursor.execute(query, (limit,))
-        projects = cursor.fetchall()
-        connection.close()
+        with db_connection() as connection, connection.cursor() as cursor:
+            cursor.execute(query, (limit,))
+            projects = cursor.fetchall()
         print(f"📊 Получено проектов из БД: {len(projects)}")
         return [{'id': row[0], 'name': row[1], 'symbol': row[2], 'url': row[3]} for row in projects]
     except Exception as e:
         print(f"❌ Ошибка БД: {e}")
         return []
 
-def find_platforms_on_project_page(driver, project):
-    """Находим платформы на странице конкретного проекта с бесконечными попытками"""
+def extract_platforms(page):
+    """Находим fundraising-платформы на уже загруженной странице проекта"""
+    driver = page.driver
+    project = page.project
     platforms_found = []
-    attempt = 0
-    max_wait_time = 300  # Максимальная задержка 5 минут
-    while True:
-        attempt += 1
+    # ============ ПОИСК "TRENDING TOKEN SALES" ============
+    trending_elements = driver.find_elements(By.XPATH,
+                                             "//*[contains(text(), 'Trending Token Sales') and not(self::script) and not(ancestor::script)]")
+    visible_trending_elements = []
+    for element in trending_elements:
         try:
-            print(f"\n🔍 Сканирование: {project['name']} ({project['symbol']}) - попытка {attempt}")
-            print(f"🌐 URL: {project['url']}")
-            # Заходим на страницу проекта с увеличенным таймаутом
-            driver.set_page_load_timeout(60)
-            driver.get(project['url'])
-            time.sleep(5)
-            # Прокручиваем страницу для загрузки всех элементов
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(3)
-            driver.execute_script("window.scrollTo(0, 0);")
-            time.sleep(2)
-
-            # ============ ПОИСК "TRENDING TOKEN SALES" ============
-            trending_elements = driver.find_elements(By.XPATH,
-                                                     "//*[contains(text(), 'Trending Token Sales') and not(self::script) and not(ancestor::script)]")
-            visible_trending_elements = []
-            for element in trending_elements:
-                try:
-                    if element.is_displayed() and element.size['width'] > 0 and element.size['height'] > 0:
-                        visible_trending_elements.append(element)
-                except:
-                    continue
-            trending_y_position = None
-            if visible_trending_elements:
-                positions = [elem.location['y'] for elem in visible_trending_elements if elem.location['y'] > 100]
-                if positions:
-                    trending_y_position = max(positions)
-                    print(f"   🎯 'Trending Token Sales' найден на Y={trending_y_position}")
+            if element.is_displayed() and element.size['width'] > 0 and element.size['height'] > 0:
+                visible_trending_elements.append(element)
+        except:
+            continue
+    trending_y_position = None
+    if visible_trending_elements:
+        positions = [elem.location['y'] for elem in visible_trending_elements if elem.location['y'] > 100]
+        if positions:
+            trending_y_position = max(positions)
+            print(f"   🎯 'Trending Token Sales' найден на Y={trending_y_position}")
 
-            # ============ ПОИСК FUNDRAISING ССЫЛОК ============
-            fundraising_links = driver.find_elements(By.XPATH, "//a[contains(@href, '/fundraising-platforms/')]")
-            print(f"   💰 Найдено fundraising ссылок: {len(fundraising_links)}")
-            for link in fundraising_links:
-                try:
-                    position = link.location
-                    text = link.text.strip()
-                    href = link.get_attribute('href')
-                    title = link.get_attribute('title') or ''
-                    # Извлекаем название платформы из URL
-                    platform_name = ""
-                    if '/fundraising-platforms/' in href:
-                        platform_name = href.split('/fundraising-platforms/')[-1]
-                        platform_name = platform_name.replace('-', ' ').title()
-                    # Определяем позицию относительно Trending Token Sales
-                    position_status = "unknown"
-                    if trending_y_position:
-                        if position['y'] < trending_y_position:
-                            position_status = "above"
-                        else:
-                            position_status = "below"
-                    platform_info = {
-                        'project_id': project['id'],
-                        'project_name': project['name'],
-                        'project_url': project['url'],
-                        'platform_name': platform_name,
-                        'platform_text': text,
-                        'platform_title': title,
-                        'platform_href': href,
-                        'position_x': position['x'],
-                        'position_y': position['y'],
-                        'position_status': position_status,
-                        'trending_position': trending_y_position
-                    }
-                    platforms_found.append(platform_info)
-                    status_emoji = "✅" if position_status == "above" else "🚫" if position_status == "below" else "❓"
-                    print(f"      {status_emoji} {platform_name} | {text} | Y={position['y']}")
-                except Exception as e:
-                    print(f"      ❌ Ошибка обработки ссылки: {e}")
-            # Если успешно получили данные, выходим из цикла
-            print(f"   ✅ Успешно обработан проект {project['name']}")
-            return platforms_found
+    # ============ ПОИСК FUNDRAISING ССЫЛОК ============
+    fundraising_links = driver.find_elements(By.XPATH, "//a[contains(@href, '/fundraising-platforms/')]")
+    print(f"   💰 Найдено fundraising ссылок: {len(fundraising_links)}")
+    for link in fundraising_links:
+        try:
+            position = link.location
+            text = link.text.strip()
+            href = link.get_attribute('href')
+            title = link.get_attribute('title') or ''
+            # Извлекаем название платформы из URL
+            platform_name = ""
+            if '/fundraising-platforms/' in href:
+                platform_name = href.split('/fundraising-platforms/')[-1]
+                platform_name = platform_name.replace('-', ' ').title()
+            # Определяем позицию относительно Trending Token Sales
+            position_status = "unknown"
+            if trending_y_position:
+                if position['y'] < trending_y_position:
+                    position_status = "above"
+                else:
+                    position_status = "below"
+            platform_info = {
+                'project_id': project['id'],
+                'project_name': project['name'],
+                'project_url': project['url'],
+                'platform_name': platform_name,
+                'platform_text': text,
+                'platform_title': title,
+                'platform_href': href,
+                'position_x': position['x'],
+                'position_y': position['y'],
+                'position_status': position_status,
+                'trending_position': trending_y_position
+            }
+            platforms_found.append(platform_info)
+            status_emoji = "✅" if position_status == "above" else "🚫" if position_status == "below" else "❓"
+            print(f"      {status_emoji} {platform_name} | {text} | Y={position['y']}")
         except Exception as e:
-            print(f"   ❌ Ошибка попытки {attempt}: {e}")
-            # Вычисляем время ожидания (экспоненциальный рост с максимумом)
-            wait_time = min(attempt * 10, max_wait_time)
-            print(f"   ⏳ Ожидание {wait_time} секунд перед попыткой {attempt + 1}...")
-            time.sleep(wait_time)
-            # Перезапускаем браузер при серьезных ошибках
-            if any(keyword in str(e).lower() for keyword in ['timeout', 'connection', 'refused', 'reset']):
-                print(f"   🔄 Перезапуск браузера из-за проблем с соединением...")
-                try:
-                    driver.quit()
-                    time.sleep(5)
-                    driver = setup_driver()
-                except Exception as restart_error:
-                    print(f"   ⚠️ Ошибка перезапуска браузера: {restart_error}")
-                    time.sleep(10)
-                    try:
-                        driver = setup_driver()
-                    except:
-                        print(f"   💥 Не удалось перезапустить браузер, пауза 30 секунд...")
-                        time.sleep(30)
-                        driver = setup_driver()
+            print(f"      ❌ Ошибка обработки ссылки: {e}")
+    print(f"   ✅ Успешно обработан проект {project['name']}")
+    return platforms_found
 
 def remove_duplicates(platforms):
     """Удаляем дубликаты платформ"""
@@ -195,13 +127,45 @@ def remove_duplicates(platforms):
     print(f"✅ Уникальных платформ: {len(unique_platforms)}")
     return unique_platforms
 
+# Слияние launchpad одним запросом на пачку проектов: объединение со старым значением (массив
+# или строка через запятую из старых версий парсера), сортировка и UPDATE только изменившихся строк.
+# COLLATE "C" — тот же порядок, что у sorted() в Python.
+MERGE_LAUNCHPADS_SQL = """
+WITH incoming (project_id, names) AS (
+    VALUES %s
+),
+merged AS (
+    SELECT u.id,
+           COALESCE((
+               SELECT jsonb_agg(name ORDER BY name COLLATE "C")
+               FROM (
+                   SELECT jsonb_array_elements_text(
+                       CASE WHEN jsonb_typeof(u.launchpad) = 'array' THEN u.launchpad ELSE '[]'::jsonb END)
+                   UNION
+                   SELECT trim(part)
+                   FROM regexp_split_to_table(
+                       CASE WHEN jsonb_typeof(u.launchpad) = 'string' THEN u.launchpad #>> '{}' END, ',') AS part
+                   UNION
+                   SELECT unnest(i.names)
+               ) AS all_names (name)
+               WHERE name <> ''
+           ), '[]'::jsonb) AS launchpad
+    FROM cryptorank_upcoming u
+    JOIN incoming i ON u.id = i.project_id
+)
+UPDATE cryptorank_upcoming u
+SET launchpad = merged.launchpad
+FROM merged
+WHERE u.id = merged.id
+  AND u.launchpad IS DISTINCT FROM merged.launchpad
+RETURNING u.id, u.project_name, u.launchpad
+"""
+
 def update_launchpads_in_db(platforms):
-    """Обновляем поле launchpad в таблице cryptorank_upcoming"""
+    """Обновляем поле launchpad в таблице cryptorank_upcoming одним запросом на все проекты"""
     print(f"\n💾 ОБНОВЛЕНИЕ LAUNCHPAD В БД (ТОЛЬКО ВАЛИДНЫЕ ПЛАТФОРМЫ):")
     print("-" * 60)
     try:
-        connection = psycopg2.connect(**DB_CONFIG)
-        cursor = connection.cursor()
         platforms_by_project = {}
         for platform in platforms:
             if platform['position_status'] != 'above':
@@ -212,46 +176,31 @@ def update_launchpads_in_db(platforms):
                 platforms_by_project[project_id] = set()
             if platform_name and platform_name.strip():
                 platforms_by_project[project_id].add(platform_name.strip())
-        updated_count = 0
-        for project_id, platform_names in platforms_by_project.items():
-            if not platform_names:
-                continue
-            cursor.execute("SELECT launchpad FROM cryptorank_upcoming WHERE id = %s", (project_id,))
-            result = cursor.fetchone()
-            current_launchpad = result[0] if result else None
-            existing_platforms = set()
-            if current_launchpad:
-                try:
-                    if isinstance(current_launchpad, str):
-                        existing_data = json.loads(current_launchpad)
-                    else:
-                        existing_data = current_launchpad
-                    if isinstance(existing_data, list):
-                        existing_platforms = set(existing_data)
-                    elif isinstance(existing_data, str):
-                        existing_platforms = set(p.strip() for p in existing_data.split(',') if p.strip())
-                except (json.JSONDecodeError, TypeError):
-                    if isinstance(current_launchpad, str):
-                        existing_platforms = set(p.strip() for p in current_launchpad.split(',') if p.strip())
-            all_platforms = existing_platforms.union(platform_names)
-            launchpad_json = json.dumps(sorted(list(all_platforms)), ensure_ascii=False)
-            if existing_platforms != all_platforms:
-                cursor.execute("UPDATE cryptorank_upcoming SET launchpad = %s WHERE id = %s", (launchpad_json, project_id))
-                updated_count += 1
-                cursor.execute("SELECT project_name FROM cryptorank_upcoming WHERE id = %s", (project_id,))
-                project_result = cursor.fetchone()
-                project_name = project_result[0] if project_result else f"ID_{project_id}"
-                platforms_str = ', '.join(sorted(list(all_platforms)))
-                print(f"   ✅ {project_name}: {platforms_str}")
-        connection.commit()
-        connection.close()
-        print(f"\n📊 Обновлено проектов: {updated_count}")
+        rows = [
+            (project_id, sorted(platform_names))
+            for project_id, platform_names in platforms_by_project.items()
+            if platform_names
+        ]
+        changed = []
+        if rows:
+            with db_connection() as connection:
+                with connection.cursor() as cursor:
+                    changed = execute_values(cursor, MERGE_LAUNCHPADS_SQL, rows,
+                                             template="(%s, %s::text[])", page_size=len(rows), fetch=True)
+                connection.commit()
+        for project_id, project_name, launchpad in changed:
+            print(f"   ✅ {project_name or f'ID_{project_id}'}: {', '.join(launchpad)}")
+        if changed:
+            bump_version(COINS)
+        print(f"\n📊 Обновлено проектов: {len(changed)}")
         print(f"💾 Всего обработано проектов: {len(platforms_by_project)}")
         print(f"🎯 Сохранены только валидные платформы (выше 'Trending Token Sales')")
+        return changed
     except Exception as e:
         print(f"❌ Ошибка обновления БД: {e}")
         import traceback
         print(traceback.format_exc())
+        return []
 
 def save_platforms_to_json(platforms):
     """Сохраняем найденные платформы в JSON файл"""
@@ -320,10 +269,17 @@ def analyze_platforms(platforms):
             print(f"      {status} {platform['platform_name']}")
     return unique_platforms
 
+def finish_platforms(results):
+    """Итоги по всем проектам: анализ, JSON и обновление launchpad в БД"""
+    all_platforms = [platform for platforms in results for platform in platforms]
+    analyze_platforms(all_platforms)
+    if all_platforms:
+        save_platforms_to_json(all_platforms)
+
+EXTRACTOR = Extractor('launchpads', extract_platforms, finish=finish_platforms)
+
 def main():
     """Главная функция"""
-    driver = None
-    all_platforms = []
     try:
         print("🔍 ПОИСК ПЛАТФОРМ НА ВСЕХ СТРАНИЦАХ ПРОЕКТОВ")
         print("=" * 60)
@@ -331,25 +287,8 @@ def main():
         if not projects:
             print("❌ Проекты в БД не найдены")
             return
-        driver = setup_driver()
-        for i, project in enumerate(projects, 1):
-            print(f"\n🚀 Проект {i}/{len(projects)}:")
-            platforms = find_platforms_on_project_page(driver, project)
-            all_platforms.extend(platforms)
-            time.sleep(3)
-        unique_platforms = analyze_platforms(all_platforms)
-        if all_platforms:
-            save_platforms_to_json(all_platforms)
+        run_extractors(projects, [EXTRACTOR])
     except Exception as e:
         print(f"❌ Критическая ошибка: {e}")
         import traceback
-        traceback.print_exc()
-    finally:
-        if driver is not None:
-            try:
-                driver.quit()
-            except:
-                pass
-        # 🔥 Принудительное завершение процессов Chrome
-        os.system("killall -q chrome chromedriver 2>/dev/null || true")
-        print("\n🔒 Браузер закрыт (принудительно)")
\ No newline at end of file
+        traceback.print_exc()
\ No newline at end of file
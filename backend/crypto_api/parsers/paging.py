@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Пагинация таблиц cryptorank: поиск кнопки следующей страницы рядом с таблицей.
+Общая для парсеров инвесторов и исторических данных.
+"""
+from selenium.webdriver.common.by import By
+
+
+def find_next_page_button(table):
+    """Ищет кнопку 'Next'"""
+    try:
+        # Поиск контейнера пагинации
+        pagination_container = None
+        try:
+            elements_after_table = table.find_elements(By.XPATH, "./following::*")
+            for elem in elements_after_table:
+                elem_classes = (elem.get_attribute('class') or '').lower()
+                if 'pagination' in elem_classes or 'sc-' in elem_classes or \
+                        elem.find_elements(By.XPATH, ".//button[@aria-label='Next page']"):
+                    pagination_container = elem
+                    break
+                if len(elements_after_table) > 20:
+                    break
+        except Exception as e:
+            print(f"   ⚠️ Ошибка поиска пагинации: {e}")
+
+        if not pagination_container:
+            try:
+                pagination_container = table.find_element(By.XPATH, "./following-sibling::*[1]")
+            except:
+                pass
+
+        if not pagination_container:
+            try:
+                parent = table.find_element(By.XPATH, "..")
+                pagination_containers = parent.find_elements(By.XPATH,
+                                                             "./*[contains(@class, 'pagination') or contains(@class, 'styles_pagination')]")
+                if pagination_containers:
+                    pagination_container = pagination_containers[0]
+            except Exception as e_inner:
+                print(f"   ⚠️ Ошибка поиска пагинации: {e_inner}")
+
+        if not pagination_container:
+            print("   ⚠️ Контейнер пагинации не найден.")
+            return None
+
+        # Поиск кнопки "Next"
+        try:
+            next_button = pagination_container.find_element(By.XPATH,
+                                                            ".//button[@aria-label='Next page' and not(@disabled)]")
+            if next_button.is_displayed() and next_button.is_enabled():
+                print(f"   🎯 Найдена кнопка Next по aria-label")
+                return next_button
+        except:
+            pass
+
+        try:
+            svg_next_buttons = pagination_container.find_elements(By.XPATH,
+                                                                  ".//button[not(@disabled)]//svg//path[contains(@d, 'M6.994 5.002')]")
+            for svg_path in svg_next_buttons:
+                try:
+                    button = svg_path.find_element(By.XPATH, "./ancestor::button[1]")
+                    if button.is_displayed() and button.is_enabled() and not button.get_attribute('disabled'):
+                        print(f"   🎯 Найдена кнопка Next по SVG")
+                        return button
+                except:
+                    continue
+        except Exception as e_svg:
+            print(f"   ⚠️ Ошибка поиска кнопки Next по SVG: {e_svg}")
+
+        try:
+            page_buttons = pagination_container.find_elements(By.XPATH,
+                                                              ".//button[contains(@class, 'styles_button__')]")
+            current_page = None
+            max_page = 0
+            page_elements = {}
+            for button in page_buttons:
+                try:
+                    if not button.is_displayed() or not button.is_enabled() or button.get_attribute('disabled'):
+                        continue
+                    span = button.find_element(By.XPATH, ".//span[contains(@class, 'styles_text__')]")
+                    text = span.text.strip()
+                    if text.isdigit():
+                        page_num = int(text)
+                        page_elements[page_num] = button
+                        max_page = max(max_page, page_num)
+                        classes = button.get_attribute('class') or ''
+                        if 'styles_selected__' in classes:
+                            current_page = page_num
+                except Exception as e_btn:
+                    continue
+
+            if current_page is not None:
+                if current_page < max_page:
+                    next_page = current_page + 1
+                    if next_page in page_elements:
+                        print(f"   ➡️ Переход на страницу {next_page}")
+                        return page_elements[next_page]
+                else:
+                    print(f"   ⏹️ Достигнута последняя страница ({current_page}).")
+                    return None
+            else:
+                if 2 in page_elements:
+                    page_1_button = page_elements.get(1)
+                    if page_1_button:
+                        classes_1 = page_1_button.get_attribute('class') or ''
+                        if 'styles_selected__' in classes_1:
+                            print(f"   ➡️ Переход на страницу 2")
+                            return page_elements[2]
+        except Exception as e_num:
+            print(f"   ⚠️ Ошибка поиска числовой пагинации: {e_num}")
+
+    except Exception as e:
+        print(f"   ⚠️ Ошибка поиска контейнера пагинации: {e}")
+    print("   ⏹️ Кнопка 'Next' не найдена.")
+    return None
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Обход страниц проектов (/ico/...) с одной загрузкой на проект.
+
+Страница загружается один раз, после чего по очереди вызываются подключённые экстракторы
+(инвесторы, launchpad-платформы, токеномика). Каждый парсер описывает свой Extractor,
+а main() запускает все три за один проход.
+"""
+import os
+import queue
+import threading
+import time
+from urllib.parse import urlparse
+
+from crypto_api.parsers.driver_pool import get_pool
+from crypto_api.parsers.readiness import wait_for_document_ready, wait_for_dom_stable, report_latencies
+
+# Число параллельных воркеров и минимальный интервал между загрузками страниц одного домена
+CONCURRENCY = int(os.environ.get('PARSER_CONCURRENCY', '3'))
+DOMAIN_MIN_INTERVAL = float(os.environ.get('CRYPTORANK_MIN_INTERVAL', '3'))
+MAX_RETRIES = 3
+
+
+class DomainRateLimiter:
+    """
+    Ограничивает частоту загрузок страниц одного домена для всех потоков.
+    Между двумя запросами к домену проходит не менее min_interval секунд.
+    """
+
+    def __init__(self, min_interval=DOMAIN_MIN_INTERVAL):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_slot = {}
+
+    def wait(self, url):
+        """Блокирует поток до момента, когда к домену url можно обратиться"""
+        domain = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(domain, now))
+            self._next_slot[domain] = slot + self.min_interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class ProjectPage:
+    """Загруженная страница проекта: драйвер, проект и снимок HTML"""
+
+    def __init__(self, driver, project):
+        self.driver = driver
+        self.project = project
+        self._html = None
+
+    @property
+    def html(self):
+        """page_source, снятый один раз после загрузки"""
+        if self._html is None:
+            self._html = self.driver.page_source
+        return self._html
+
+
+class Extractor:
+    """
+    Извлекатель данных со страницы проекта.
+    :param extract: extract(page) -> результат или None
+    :param save: save(project, result) — сохранение результата одного проекта
+    :param finish: finish(results) — итоговая обработка всех непустых результатов
+    """
+
+    def __init__(self, name, extract, save=None, finish=None):
+        self.name = name
+        self.extract = extract
+        self.save = save
+        self.finish = finish
+
+
+def load_project_page(driver, project, rate_limiter=None):
+    """Открывает страницу проекта и дожидается догрузки всех секций"""
+    print(f"🌐 Открываем: {project['url']}")
+    if rate_limiter is not None:
+        rate_limiter.wait(project['url'])
+    driver.set_page_load_timeout(90)
+    driver.get(project['url'])
+    wait_for_document_ready(driver, stage='project.page_load')
+    wait_for_dom_stable(driver, stage='project.render')
+    # Прокручиваем страницу для загрузки ленивых секций
+    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+    wait_for_dom_stable(driver, stage='project.lazy_load')
+    driver.execute_script("window.scrollTo(0, 0);")
+    wait_for_dom_stable(driver, stage='project.layout', quiet=0.3)
+    return ProjectPage(driver, project)
+
+
+def visit_project(driver, project, extractors, rate_limiter=None, max_retries=MAX_RETRIES):
+    """
+    Загружает страницу проекта один раз и запускает на ней все экстракторы.
+    После ошибки загрузки драйвер пересоздаётся через пул (аренда продолжается с новым).
+    :return: dict {имя экстрактора: результат}
+    """
+    for attempt in range(max_retries):
+        try:
+            page = load_project_page(driver, project, rate_limiter)
+            break
+        except Exception as e:
+            print(f"   ❌ Ошибка загрузки (попытка {attempt + 1}/{max_retries}): {e}")
+            # Упавший или зависший браузер не должен вернуться в пул: и повтор, и следующие проекты получат новый
+            driver = get_pool().restart(driver)
+            if attempt == max_retries - 1:
+                print(f"   💥 Все попытки исчерпаны")
+                return {}
+            time.sleep(3 + attempt * 2)
+
+    results = {}
+    for extractor in extractors:
+        try:
+            results[extractor.name] = extractor.extract(page)
+        except Exception as e:
+            print(f"   ❌ Ошибка экстрактора {extractor.name}: {e}")
+            results[extractor.name] = None
+    return results
+
+
+def save_results(project, extractors, results):
+    """Сохраняет результаты экстракторов по одному проекту; возвращает только непустые результаты"""
+    saved = {}
+    for extractor in extractors:
+        result = results.get(extractor.name)
+        if result is None:
+            continue
+        if extractor.save is not None:
+            extractor.save(project, result)
+        saved[extractor.name] = result
+    return saved
+
+
+def visit_projects(projects, extractors, concurrency=CONCURRENCY, rate_limiter=None):
+    """
+    Обходит страницы проектов в concurrency потоков.
+    Каждый воркер арендует драйвер из общего пула и забирает проекты из общей очереди,
+    частоту обращений к домену ограничивает общий rate_limiter.
+    :return: dict {имя экстрактора: список непустых результатов}
+    """
+    if rate_limiter is None:
+        rate_limiter = DomainRateLimiter()
+    tasks = queue.Queue()
+    for position, project in enumerate(projects, 1):
+        tasks.put((position, project))
+    concurrency = max(1, min(concurrency, len(projects)))
+    collected = {extractor.name: [] for extractor in extractors}
+    results_lock = threading.Lock()
+
+    def worker(worker_id):
+        pool = get_pool()
+        try:
+            while True:
+                try:
+                    position, project = tasks.get_nowait()
+                except queue.Empty:
+                    break
+                print(f"\n{'=' * 20} ПРОЕКТ {position}/{len(projects)}: {project['name']} (воркер {worker_id}) {'=' * 20}")
+                with pool.lease(implicit_wait=5) as driver:
+                    results = visit_project(driver, project, extractors, rate_limiter)
+                saved = save_results(project, extractors, results)
+                with results_lock:
+                    for name, result in saved.items():
+                        collected[name].append(result)
+        except Exception as e:
+            print(f"   💥 Воркер {worker_id} остановлен: {e}")
+
+    names = ", ".join(extractor.name for extractor in extractors)
+    print(f"🧵 Запуск {concurrency} воркеров ({names}), интервал между запросами к домену: {rate_limiter.min_interval} сек.")
+    threads = [
+        threading.Thread(target=worker, args=(worker_id,), name=f"project-page-{worker_id}", daemon=True)
+        for worker_id in range(1, concurrency + 1)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return collected
+
+
+def run_extractors(projects, extractors, concurrency=CONCURRENCY):
+    """Обходит проекты и вызывает finish() каждого экстрактора"""
+    collected = visit_projects(projects, extractors, concurrency)
+    for extractor in extractors:
+        if extractor.finish is not None:
+            try:
+                extractor.finish(collected[extractor.name])
+            except Exception as e:
+                print(f"❌ Ошибка итоговой обработки {extractor.name}: {e}")
+    get_pool().report()
+    report_latencies()
+    return collected
+
+
+def default_extractors():
+    """Экстракторы страницы проекта. Порядок важен: инвесторы листают пагинацию и меняют DOM, поэтому идут последними"""
+    from crypto_api.parsers import investors, launchpads, tokenomics
+    return [launchpads.EXTRACTOR, tokenomics.EXTRACTOR, investors.EXTRACTOR]
+
+
+def main(concurrency=CONCURRENCY):
+    """Инвесторы, launchpad-платформы и токеномика за одну загрузку каждой страницы проекта"""
+    from crypto_api.parsers import investors
+
+    print("🚀 ОБХОД СТРАНИЦ ПРОЕКТОВ: ИНВЕСТОРЫ + LAUNCHPAD + ТОКЕНОМИКА")
+    print("=" * 60)
+    projects = investors.get_projects_from_db(20)
+    if not projects:
+        print("❌ Не удалось получить список проектов.")
+        return
+    run_extractors(projects, default_extractors(), concurrency)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ожидание готовности страницы вместо фиксированных time.sleep.
+
+Каждое ожидание возвращается, как только нужный элемент появился (или DOM перестал меняться),
+а его длительность записывается в гистограмму по этапам:
+
+    table = wait_for(driver, (By.TAG_NAME, "table"), stage='historical.table')
+    report_latencies()
+"""
+import bisect
+import threading
+import time
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+POLL_FREQUENCY = 0.1
+
+# Границы корзин гистограммы, секунды
+BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 15, 30, 60)
+
+# Запоминает время последнего изменения DOM и возвращает, сколько мс DOM не менялся
+_DOM_QUIET_JS = """
+if (!window.__readinessObserver) {
+    window.__lastMutation = Date.now();
+    window.__readinessObserver = new MutationObserver(function () {
+        window.__lastMutation = Date.now();
+    });
+    window.__readinessObserver.observe(document, {childList: true, subtree: true});
+}
+return Date.now() - window.__lastMutation;
+"""
+
+
+class LatencyHistogram:
+    """Потокобезопасная гистограмма длительностей ожидания по этапам"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    def observe(self, stage, seconds, ok=True):
+        with self._lock:
+            data = self._stages.setdefault(stage, {
+                'counts': [0] * (len(self.buckets) + 1),
+                'count': 0,
+                'timeouts': 0,
+                'total': 0.0,
+                'max': 0.0,
+            })
+            data['counts'][bisect.bisect_left(self.buckets, seconds)] += 1
+            data['count'] += 1
+            data['total'] += seconds
+            data['max'] = max(data['max'], seconds)
+            if not ok:
+                data['timeouts'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {stage: {**data, 'counts': list(data['counts'])} for stage, data in self._stages.items()}
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+
+
+histogram = LatencyHistogram()
+
+
+def _timed(stage, wait):
+    started = time.monotonic()
+    ok = True
+    try:
+        return wait()
+    except TimeoutException:
+        ok = False
+        raise
+    finally:
+        histogram.observe(stage, time.monotonic() - started, ok)
+
+
+def wait_for(driver, locator, stage, timeout=15, condition=EC.presence_of_element_located):
+    """
+    Ждёт элемент по locator (кортеж By, значение).
+    :return: результат condition (обычно WebElement) или None по таймауту
+    """
+    try:
+        return _timed(stage, lambda: WebDriverWait(driver, timeout, POLL_FREQUENCY).until(condition(locator)))
+    except TimeoutException:
+        return None
+
+
+def wait_for_document_ready(driver, stage, timeout=30):
+    """Ждёт document.readyState == 'complete'"""
+    try:
+        return _timed(stage, lambda: WebDriverWait(driver, timeout, POLL_FREQUENCY).until(
+            lambda d: d.execute_script("return document.readyState") == 'complete'
+        ))
+    except TimeoutException:
+        return False
+
+
+def wait_for_dom_stable(driver, stage, quiet=0.5, timeout=10):
+    """
+    Ждёт, пока DOM не меняется quiet секунд (догрузка после скролла, отрисовка SPA).
+    :return: True, если DOM успокоился, False по таймауту
+    """
+    quiet_ms = quiet * 1000
+    try:
+        return _timed(stage, lambda: WebDriverWait(driver, timeout, POLL_FREQUENCY).until(
+            lambda d: d.execute_script(_DOM_QUIET_JS) >= quiet_ms
+        ))
+    except TimeoutException:
+        return False
+
+
+def report_latencies():
+    """Печатает гистограмму ожиданий по этапам"""
+    stages = histogram.snapshot()
+    if not stages:
+        return
+    labels = [f"≤{b}s" for b in histogram.buckets] + [f">{histogram.buckets[-1]}s"]
+    print("⏱️ Ожидание готовности страниц по этапам:")
+    for stage, data in sorted(stages.items()):
+        avg = data['total'] / data['count']
+        print(f"   {stage:<28} n={data['count']:<4} avg={avg:.2f}s max={data['max']:.2f}s "
+              f"timeouts={data['timeouts']}")
+        buckets = ", ".join(f"{label}: {count}" for label, count in zip(labels, data['counts']) if count)
+        print(f"      {buckets}")
@@ -4,68 +4,22 @@ import json
 import time
 import re
 import os
-import psycopg2
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from datetime import datetime
 
+from crypto_api.cache import TOKENOMICS, bump_version
+from crypto_api.parsers.db_pool import db_connection
+from crypto_api.parsers.project_page import Extractor, run_extractors
+from crypto_api.parsers.readiness import wait_for
+
 # 🔥 УСТАНАВЛИВАЕМ ПУТЬ ДЛЯ SELENIUM
 os.environ['SELENIUM_CACHE_PATH'] = '/app/.cache/selenium'
 os.makedirs('/app/.cache/selenium', exist_ok=True)
 
-# --- Настройки БД ---
-DB_CONFIG = {
-    'host': os.environ.get('DB_HOST', 'localhost'),
-    'port': os.environ.get('DB_PORT', '5432'),
-    'database': os.environ.get('DB_NAME', 'crypto_db'),
-    'user': os.environ.get('DB_USER', 'crypto_user'),
-    'password': os.environ.get('DB_PASSWORD', 'crypto_password')
-}
-
-
-def setup_driver():
-    """Настройка браузера с включёнными стилями и шрифтами"""
-    print("🔧 Запуск браузера...")
-    options = Options()
-    # Настройки для корректного отображения легенд и графиков
-    chrome_prefs = {
-        "profile.default_content_settings": {
-            "images": 2,
-            "javascript": 1
-        },
-        "profile.managed_default_content_settings": {
-            "images": 2,
-            "stylesheets": 1,  # Важно для отображения легенды
-            "fonts": 1,
-            "javascript": 1,
-            "plugins": 2,
-            "popups": 2,
-            "geolocation": 2,
-            "notifications": 2
-        }
-    }
-    options.add_argument('--headless=new')  # Включаем headless режим
-    options.add_argument('--no-sandbox')
-    options.add_argument('--disable-dev-shm-usage')
-    options.add_argument('--disable-gpu')
-    options.add_argument('--window-size=1920,1080')
-    options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
-    options.add_experimental_option("prefs", chrome_prefs)
-
-    driver = webdriver.Chrome(options=options)
-    driver.implicitly_wait(10)
-    print("   ✅ Браузер запущен (стили и шрифты включены)")
-    return driver
-
 
 def get_projects_from_db(limit=20):
     """Получаем проекты из таблицы cryptorank_upcoming"""
     try:
-        connection = psycopg2.connect(**DB_CONFIG)
-        cursor = connection.cursor()
         query = """
         SELECT id, project_name, project_symbol, project_url 
         FROM cryptorank_upcoming 
@@ -74,9 +28,9 @@ def get_projects_from_db(limit=20):
         ORDER BY id 
         LIMIT %s
         """
-        cursor.execute(query, (limit,))
-        projects = cursor.fetchall()
-        connection.close()
+        with db_connection() as connection, connection.cursor() as cursor:
+            cursor.execute(query, (limit,))
+            projects = cursor.fetchall()
         print(f"📊 Получено проектов из БД: {len(projects)}")
         return [
             {'id': row[0], 'name': row[1], 'symbol': row[2], 'url': row[3].strip()}
@@ -95,12 +49,11 @@ def is_ico_page(url):
 def find_tokenomics_section(driver):
     """Ищем секцию Tokenomics"""
     try:
-        WebDriverWait(driver, 15).until(
-            EC.presence_of_element_located((By.XPATH, "//h2[contains(text(), 'Tokenomics')]"))
-        )
-        header = driver.find_element(By.XPATH, "//h2[contains(text(), 'Tokenomics')]")
+        header = wait_for(driver, (By.XPATH, "//h2[contains(text(), 'Tokenomics')]"), stage='tokenomics.section')
+        if header is None:
+            print("   ⚠️ Секция 'Tokenomics' не найдена: таймаут")
+            return False
         driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", header)
-        time.sleep(1)
         print("   ✅ Секция 'Tokenomics' найдена")
         return True
     except Exception as e:
@@ -158,26 +111,24 @@ def parse_distribution_chart(driver):
     """Парсим распределение из <ul class='sc-3b4c91db-0'>"""
     distribution = {}
     try:
-        WebDriverWait(driver, 15).until(
-            EC.presence_of_element_located((By.XPATH, "//ul[contains(@class, 'sc-3b4c91db-0')]"))
-        )
-        tokenomics = driver.find_element(By.XPATH, "//h2[contains(text(), 'Tokenomics')]")
-        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", tokenomics)
-        time.sleep(2)
-
-        list_container = driver.find_element(By.XPATH, "//ul[contains(@class, 'sc-3b4c91db-0')]")
+        list_container = wait_for(driver, (By.XPATH, "//ul[contains(@class, 'sc-3b4c91db-0')]"),
+                                  stage='tokenomics.legend')
+        if list_container is None:
+            print("   ⚠️ Не удалось найти легенду распределения: таймаут")
+            return {}
+        # Легенда отрисовывается вместе с графиком — ждём первую подпись категории
+        wait_for(driver, (By.XPATH, "//ul[contains(@class, 'sc-3b4c91db-0')]//li//p[contains(@class, 'hMaTTx')]"),
+                 stage='tokenomics.legend_items')
         items = list_container.find_elements(By.XPATH, ".//li")
 
         for item in items:
             try:
-                driver.execute_script("arguments[0].scrollIntoView({block: 'nearest'});", item)
-                time.sleep(0.3)
-
                 category_elem = item.find_element(By.XPATH, ".//p[contains(@class, 'hMaTTx')]")
                 percentage_elem = item.find_element(By.XPATH, ".//div[contains(@class, 'fsLhYV')]//span")
 
-                category = category_elem.text.strip()
-                percentage = percentage_elem.text.strip()
+                # textContent не требует прокрутки элемента в область видимости, в отличие от .text
+                category = (category_elem.get_attribute('textContent') or '').strip()
+                percentage = (percentage_elem.get_attribute('textContent') or '').strip()
 
                 if category and percentage:
                     distribution[category] = percentage
@@ -194,16 +145,13 @@ def parse_distribution_chart(driver):
 
 
 # --- ✅ НОВАЯ ФУНКЦИЯ: Сохранение в БД ---
-def save_tokenomics_to_db(tokenomics_data, db_config):
+def save_tokenomics_to_db(tokenomics_data, conn=None):
     """
     Сохраняет токеномику в таблицу cryptorank_tokenomics
     :param tokenomics_data: dict с ключами 'project_name', 'distribution' и др.
-    :param db_config: параметры подключения к БД
+    :param conn: соединение с БД (по умолчанию — из общего пула)
     """
     try:
-        conn = psycopg2.connect(**db_config)
-        cursor = conn.cursor()
-
         project_name = tokenomics_data['project_name']
         distribution = tokenomics_data.get('distribution', {})
         initial_values = tokenomics_data.get('initial_values', {})
@@ -218,67 +166,82 @@ def save_tokenomics_to_db(tokenomics_data, db_config):
             "scraped_at": tokenomics_data['scraped_at']
         }
 
+        project_id = tokenomics_data.get('project_id')
+
         # UPSERT: вставка или обновление
         upsert_query = """
-        INSERT INTO cryptorank_tokenomics (project_name, tokenomics)
-        VALUES (%s, %s)
+        INSERT INTO cryptorank_tokenomics (project_name, project_id, tokenomics)
+        VALUES (%s, %s, %s)
         ON CONFLICT (project_name) 
-        DO UPDATE SET tokenomics = EXCLUDED.tokenomics, updated_at = CURRENT_TIMESTAMP;
+        DO UPDATE SET tokenomics = EXCLUDED.tokenomics,
+                      project_id = COALESCE(EXCLUDED.project_id, cryptorank_tokenomics.project_id),
+                      updated_at = CURRENT_TIMESTAMP;
         """
-        cursor.execute(upsert_query, (project_name, json.dumps(tokenomics_json, ensure_ascii=False)))
-        conn.commit()
+        with db_connection(conn) as conn:
+            with conn.cursor() as cursor:
+                if project_id is not None:
+                    # Проект переименован: старая запись токеномики больше не его (project_id уникален)
+                    cursor.execute(
+                        "UPDATE cryptorank_tokenomics SET project_id = NULL WHERE project_id = %s AND project_name <> %s",
+                        (project_id, project_name)
+                    )
+                cursor.execute(upsert_query, (project_name, project_id, json.dumps(tokenomics_json, ensure_ascii=False)))
+            conn.commit()
+        bump_version(TOKENOMICS)
         print(f"✅ Токеномика сохранена в БД: {project_name}")
-        cursor.close()
-        conn.close()
     except Exception as e:
         print(f"❌ Ошибка сохранения в БД: {e}")
 
 
+def refresh_tokenomics_detailed(conn=None):
+    """
+    Пересчитывает материализованное представление tokenomics_detailed.
+    CONCURRENTLY: API продолжает читать старые данные, пока идёт пересчёт.
+    Вызывается один раз после пачки сохранений, а не после каждого проекта.
+    """
+    try:
+        started = time.monotonic()
+        with db_connection(conn) as conn:
+            with conn.cursor() as cursor:
+                cursor.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY tokenomics_detailed")
+            conn.commit()
+        bump_version(TOKENOMICS)
+        print(f"🔄 tokenomics_detailed обновлено за {time.monotonic() - started:.2f} сек.")
+        return True
+    except Exception as e:
+        print(f"❌ Ошибка обновления tokenomics_detailed: {e}")
+        return False
+
+
 # --- ОСНОВНАЯ ФУНКЦИЯ ---
-def scan_project_tokenomics(driver, project, max_retries=3):
-    """Парсим токеномику с одной страницы"""
-    for attempt in range(max_retries):
-        try:
-            print(f"\n🔍 Парсим токеномику: {project['name']} (попытка {attempt + 1}/{max_retries})")
-
-            if not is_ico_page(project['url']):
-                print("   ⚠️ Пропуск: не ICO-страница")
-                return None
-
-            print(f"🌐 Открываем: {project['url']}")
-            driver.get(project['url'])
-            WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
-
-            if not find_tokenomics_section(driver):
-                return None
-
-            # Сбор данных
-            data = {
-                'project_id': project['id'],
-                'project_name': project['name'],
-                'project_symbol': project['symbol'],
-                'ico_url': project['url'],
-                'scraped_at': datetime.now().isoformat()
-            }
-
-            data['initial_values'] = parse_initial_values(driver)
-            data['token_allocation'] = parse_token_allocation(driver)
-            data['distribution'] = parse_distribution_chart(driver)
-
-            print(f"   ✅ Успешно: токеномика собрана")
-            return data
-
-        except Exception as e:
-            print(f"   ❌ Ошибка: {e}")
-            if attempt < max_retries - 1:
-                time.sleep(3 + attempt * 2)
-                try:
-                    driver.refresh()
-                except:
-                    print("   ⚠️ Не удалось обновить страницу")
-            else:
-                print(f"   💥 Все попытки исчерпаны")
-    return None
+def extract_tokenomics(page):
+    """Парсим токеномику с уже загруженной страницы проекта"""
+    driver = page.driver
+    project = page.project
+    print(f"\n🔍 Парсим токеномику: {project['name']}")
+
+    if not is_ico_page(project['url']):
+        print("   ⚠️ Пропуск: не ICO-страница")
+        return None
+
+    if not find_tokenomics_section(driver):
+        return None
+
+    # Сбор данных
+    data = {
+        'project_id': project['id'],
+        'project_name': project['name'],
+        'project_symbol': project['symbol'],
+        'ico_url': project['url'],
+        'scraped_at': datetime.now().isoformat()
+    }
+
+    data['initial_values'] = parse_initial_values(driver)
+    data['token_allocation'] = parse_token_allocation(driver)
+    data['distribution'] = parse_distribution_chart(driver)
+
+    print(f"   ✅ Успешно: токеномика собрана")
+    return data
 
 
 def save_to_json(data_list):
@@ -297,49 +260,15 @@ def save_to_json(data_list):
     return filename
 
 
-def main():
-    print("📊 ПАРСИНГ ТОКЕНОМИКИ С ICO-СТРАНИЦ (из БД)")
-    print("=" * 60)
-
-    driver = None
-    all_tokenomics = []
-
-    try:
-        projects = get_projects_from_db(limit=20)
-        if not projects:
-            print("❌ Нет проектов для обработки")
-            return
-
-        driver = setup_driver()
-
-        for i, project in enumerate(projects, 1):
-            print(f"\n🚀 [{i}/{len(projects)}] Обработка: {project['name']}")
-            data = scan_project_tokenomics(driver, project)
-
-            if data is not None:
-                all_tokenomics.append(data)
-                # ✅ Сохраняем в БД сразу после парсинга
-                save_tokenomics_to_db(data, DB_CONFIG)
+def save_project_tokenomics(project, data):
+    """Сохраняем токеномику проекта в БД сразу после парсинга"""
+    save_tokenomics_to_db(data)
 
-            time.sleep(2)
 
-    except Exception as e:
-        print(f"❌ Критическая ошибка: {e}")
-        import traceback
-        traceback.print_exc()
-
-    finally:
-        if driver is not None:
-            try:
-                driver.quit()
-            except:
-                pass
-        # 🔥 Принудительное завершение процессов
-        os.system("killall -q chrome chromedriver 2>/dev/null || true")
-        print("\n🔒 Браузер закрыт (принудительно)")
-
-    # Сохранение в JSON (опционально)
+def finish_tokenomics(all_tokenomics):
+    """Обновление tokenomics_detailed, сохранение в JSON (опционально) и пример данных"""
     if all_tokenomics:
+        refresh_tokenomics_detailed()
         save_to_json(all_tokenomics)
         print(f"\n📋 Пример данных:")
         ex = all_tokenomics[0]
@@ -352,4 +281,26 @@ def main():
             top = ", ".join([f"{k}({v})" for k, v in list(ex['distribution'].items())[:3]])
             print(f"     🎯 {top}")
     else:
-        print("❌ Ничего не найдено.")
\ No newline at end of file
+        print("❌ Ничего не найдено.")
+
+
+EXTRACTOR = Extractor('tokenomics', extract_tokenomics, save=save_project_tokenomics, finish=finish_tokenomics)
+
+
+def main():
+    print("📊 ПАРСИНГ ТОКЕНОМИКИ С ICO-СТРАНИЦ (из БД)")
+    print("=" * 60)
+
+    try:
+        projects = get_projects_from_db(limit=20)
+        projects = [project for project in projects if is_ico_page(project['url'])]
+        if not projects:
+            print("❌ Нет проектов для обработки")
+            return
+
+        run_extractors(projects, [EXTRACTOR])
+
+    except Exception as e:
+        print(f"❌ Критическая ошибка: {e}")
+        import traceback
+        traceback.print_exc()
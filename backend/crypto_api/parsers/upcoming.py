@@ -4,12 +4,16 @@
 import json
 import time
 import os
-import psycopg2
-from psycopg2.extras import RealDictCursor
-from selenium import webdriver
+from psycopg2.extras import RealDictCursor, execute_values
 from selenium.webdriver.common.by import By
 from datetime import datetime
 
+from crypto_api.cache import COINS, bump_version
+from crypto_api.parsers.db_pool import db_connection
+from crypto_api.parsers.dom import SNAPSHOT_MODE, parse_html, node_text
+from crypto_api.parsers.driver_pool import get_pool
+from crypto_api.parsers.readiness import wait_for, wait_for_dom_stable, report_latencies
+
 
 # 🔥 УСТАНАВЛИВАЕМ ПУТЬ ДЛЯ SELENIUM САМОЙ ПЕРВОЙ СТРОКОЙ
 os.environ['SELENIUM_CACHE_PATH'] = '/tmp/selenium'
@@ -25,57 +29,6 @@ class CryptoRankUpcomingParser:
     def __init__(self):
         self.upcoming_url = "https://cryptorank.io/upcoming-ico"
 
-        # Настройки БД
-        self.db_config = {
-            'host': os.environ.get('DB_HOST', 'postgres'),
-            'port': os.environ.get('DB_PORT', '5432'),
-            'database': os.environ.get('DB_NAME', 'crypto_db'),
-            'user': os.environ.get('DB_USER', 'crypto_user'),
-            'password': os.environ.get('DB_PASSWORD', 'crypto_password')
-        }
-
-    def get_db_connection(self):
-        """Создает подключение к БД"""
-        try:
-            conn = psycopg2.connect(**self.db_config)
-            return conn
-        except Exception as e:
-            print(f"❌ Ошибка подключения к БД: {e}")
-            return None
-
-    def setup_driver(self, headless=True):
-        """Настройка браузера"""
-        print("🔧 Настройка браузера...")
-        options = webdriver.ChromeOptions()
-
-        if headless:
-            options.add_argument('--headless=new')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        options.add_argument('--disable-gpu')
-        options.add_argument('--disable-extensions')
-        options.add_argument('--disable-plugins')
-        options.add_argument('--disable-images')
-        options.add_argument('--disable-web-security')
-        options.add_argument('--allow-running-insecure-content')
-        options.add_argument('--disable-features=VizDisplayCompositor')
-        options.add_argument('--window-size=1920,1080')
-        options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
-
-        # Уникальная директория профиля
-        user_data_dir = f"/tmp/chrome_profile_{os.getpid()}"
-        os.makedirs(user_data_dir, exist_ok=True)
-        options.add_argument(f'--user-data-dir={user_data_dir}')
-
-        try:
-            driver = webdriver.Chrome(options=options)
-            driver.implicitly_wait(10)
-            print("✅ Браузер готов")
-            return driver
-        except Exception as e:
-            print(f"❌ Ошибка запуска браузера: {e}")
-            return None
-
     def convert_date_format(self, when_text):
         """Конвертирует '14 Aug' → '2025-08-14'"""
         if not when_text or 'TBA' in when_text.upper():
@@ -93,6 +46,9 @@ class CryptoRankUpcomingParser:
 
     def extract_projects(self, driver):
         """Извлекает проекты из таблицы"""
+        if SNAPSHOT_MODE:
+            return self.extract_projects_from_html(driver.page_source, driver.current_url)
+
         print("🔍 Поиск проектов...")
         projects = []
 
@@ -167,6 +123,59 @@ class CryptoRankUpcomingParser:
             print(f"❌ Ошибка извлечения проектов: {e}")
             return []
 
+    def extract_projects_from_html(self, html, base_url):
+        """Извлекает проекты из снимка страницы (один запрос page_source вместо запроса на каждую ячейку)"""
+        print("🔍 Поиск проектов (снимок DOM)...")
+        projects = []
+
+        try:
+            rows = parse_html(html, base_url).xpath("//tr[@role='row']")
+            print(f" ✓ Найдено строк: {len(rows)}")
+
+            for idx, row in enumerate(rows):
+                try:
+                    cells = row.xpath("./td")
+                    if len(cells) < 8:
+                        continue
+
+                    # Проект и URL
+                    links = cells[1].xpath(".//a")
+                    if not links:
+                        continue
+                    project_name = node_text(links[0])
+                    project_url = links[0].get('href')
+
+                    texts = [node_text(cell) for cell in cells]
+                    project_data = {
+                        'row_index': idx + 1,
+                        'project': {
+                            'name': project_name,
+                            'symbol': texts[2],
+                            'url': project_url
+                        },
+                        'type': texts[3],
+                        'initial_cap': texts[4],
+                        'ido_raise': texts[5] if texts[5] != '-' else None,
+                        'when': texts[6],
+                        'moni_score': texts[7] if texts[7] != '-' else None,
+                        'investors': [],
+                        'launchpad': []
+                    }
+
+                    if project_url and '/ico/' in project_url:
+                        projects.append(project_data)
+
+                except Exception as e:
+                    print(f"⚠️ Ошибка парсинга строки: {e}")
+                    continue
+
+            print(f"✅ Найдено проектов: {len(projects)}")
+            return projects
+
+        except Exception as e:
+            print(f"❌ Ошибка извлечения проектов: {e}")
+            return []
+
     def merge_lists(self, existing, new_list):
         """Объединяет два списка без дубликатов"""
         combined = existing.copy() if existing else []
@@ -175,44 +184,79 @@ class CryptoRankUpcomingParser:
                 combined.append(item)
         return combined
 
+    # Слияние JSONB-списков в SQL: к уже сохранённым элементам дописываются новые, которых ещё нет, в исходном порядке
+    MERGE_LIST_SQL = """
+        COALESCE(cryptorank_upcoming.{column}, '[]'::jsonb) || COALESCE((
+            SELECT jsonb_agg(item.value ORDER BY item.ord)
+            FROM (
+                SELECT DISTINCT ON (value) value, ord
+                FROM jsonb_array_elements(EXCLUDED.{column}) WITH ORDINALITY AS new_items(value, ord)
+                ORDER BY value, ord
+            ) AS item
+            WHERE NOT EXISTS (
+                SELECT 1 FROM jsonb_array_elements(COALESCE(cryptorank_upcoming.{column}, '[]'::jsonb)) AS old_items(value)
+                WHERE old_items.value = item.value
+            )
+        ), '[]'::jsonb)"""
+
+    UPSERT_SQL = """
+        INSERT INTO cryptorank_upcoming (
+            row_index, project_name, project_symbol, project_url,
+            project_type, initial_cap, ido_raise, launch_date,
+            launch_date_original, moni_score, investors, launchpad,
+            parsed_at, updated_at
+        ) VALUES %s
+        ON CONFLICT (project_url) DO UPDATE SET
+            row_index = EXCLUDED.row_index,
+            project_name = EXCLUDED.project_name,
+            project_symbol = EXCLUDED.project_symbol,
+            project_type = EXCLUDED.project_type,
+            initial_cap = EXCLUDED.initial_cap,
+            ido_raise = EXCLUDED.ido_raise,
+            launch_date = EXCLUDED.launch_date,
+            launch_date_original = EXCLUDED.launch_date_original,
+            moni_score = EXCLUDED.moni_score,
+            investors = {investors},
+            launchpad = {launchpad},
+            updated_at = CURRENT_TIMESTAMP,
+            parsed_at = CURRENT_TIMESTAMP
+        RETURNING (xmax = 0) AS inserted
+    """.format(investors=MERGE_LIST_SQL.format(column='investors'),
+               launchpad=MERGE_LIST_SQL.format(column='launchpad'))
+
     def save_to_database(self, projects):
-        """Сохраняет проекты в таблицу cryptorank_upcoming"""
+        """
+        Сохраняет проекты в таблицу cryptorank_upcoming одним INSERT ... ON CONFLICT (project_url).
+        Списки инвесторов и launchpad сливаются с уже сохранёнными в SQL;
+        число новых и обновлённых строк берётся из RETURNING того же запроса (xmax = 0 у вставленных).
+        """
         if not projects:
             print("❌ Нет данных для сохранения")
             return
 
-        conn = self.get_db_connection()
-        if not conn:
-            return
-
-        cursor = conn.cursor()
-        new_count = 0
-        updated_count = 0
         skipped_count = 0
-
-        print("💾 Сохранение в БД...")
-        try:
-            for project in projects:
-                project_info = project.get('project', {})
-                url = project_info.get('url')
-                if not url:
-                    skipped_count += 1
-                    continue
-
-                # Конвертируем дату
-                when_text = project.get('when')
-                launch_date, launch_date_original = self.convert_date_format(when_text)
-
-                # Проверяем существование по URL
-                cursor.execute("""
-                    SELECT id, updated_at, investors, launchpad 
-                    FROM cryptorank_upcoming 
-                    WHERE project_url = %s
-                """, (url,))
-                existing = cursor.fetchone()
-
-                # Собираем данные
-                data_tuple = (
+        rows_by_url = {}
+        for project in projects:
+            project_info = project.get('project', {})
+            url = project_info.get('url')
+            if not url:
+                skipped_count += 1
+                continue
+
+            # Конвертируем дату
+            when_text = project.get('when')
+            launch_date, launch_date_original = self.convert_date_format(when_text)
+            investors = project.get('investors', [])
+            launchpad = project.get('launchpad', [])
+
+            # ON CONFLICT не может обновить одну строку дважды за запрос — повторы URL сливаем заранее
+            previous = rows_by_url.get(url)
+            if previous:
+                investors = self.merge_lists(previous['investors'], investors)
+                launchpad = self.merge_lists(previous['launchpad'], launchpad)
+
+            rows_by_url[url] = {
+                'values': (
                     project.get('row_index'),
                     project_info.get('name'),
                     project_info.get('symbol'),
@@ -223,64 +267,34 @@ class CryptoRankUpcomingParser:
                     launch_date,
                     launch_date_original,
                     project.get('moni_score'),
-                    json.dumps(project.get('investors', [])),
-                    json.dumps(project.get('launchpad', []))
+                ),
+                'investors': investors,
+                'launchpad': launchpad,
+            }
+
+        if not rows_by_url:
+            print(f"❌ Нет проектов с URL (пропущено: {skipped_count})")
+            return
+
+        print("💾 Сохранение в БД...")
+        try:
+            rows = [
+                row['values'] + (json.dumps(row['investors']), json.dumps(row['launchpad']))
+                for row in rows_by_url.values()
+            ]
+            with db_connection() as conn, conn.cursor() as cursor:
+                # page_size = число строк: один запрос на весь список
+                results = execute_values(
+                    cursor, self.UPSERT_SQL, rows,
+                    template="(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s::jsonb, %s::jsonb, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)",
+                    page_size=len(rows),
+                    fetch=True
                 )
+                conn.commit()
+            new_count = sum(1 for (inserted,) in results if inserted)
+            updated_count = len(results) - new_count
 
-                if existing:
-                    # Обновляем существующую запись
-                    existing_id = existing[0]
-                    existing_investors = existing[2] if existing[2] else []
-                    existing_launchpad = existing[3] if existing[3] else []
-
-                    # Слияние инвесторов и launchpad
-                    merged_investors = self.merge_lists(existing_investors, project.get('investors', []))
-                    merged_launchpad = self.merge_lists(existing_launchpad, project.get('launchpad', []))
-
-                    cursor.execute("""
-                        UPDATE cryptorank_upcoming SET
-                            row_index = %s,
-                            project_name = %s,
-                            project_symbol = %s,
-                            project_type = %s,
-                            initial_cap = %s,
-                            ido_raise = %s,
-                            launch_date = %s,
-                            launch_date_original = %s,
-                            moni_score = %s,
-                            investors = %s::jsonb,
-                            launchpad = %s::jsonb,
-                            updated_at = CURRENT_TIMESTAMP,
-                            parsed_at = CURRENT_TIMESTAMP
-                        WHERE project_url = %s
-                    """, (
-                        project.get('row_index'),
-                        project_info.get('name'),
-                        project_info.get('symbol'),
-                        project.get('type'),
-                        project.get('initial_cap'),
-                        project.get('ido_raise'),
-                        launch_date,
-                        launch_date_original,
-                        project.get('moni_score'),
-                        json.dumps(merged_investors),
-                        json.dumps(merged_launchpad),
-                        url
-                    ))
-                    updated_count += 1
-                else:
-                    # Вставляем новую запись
-                    cursor.execute("""
-                        INSERT INTO cryptorank_upcoming (
-                            row_index, project_name, project_symbol, project_url,
-                            project_type, initial_cap, ido_raise, launch_date,
-                            launch_date_original, moni_score, investors, launchpad,
-                            parsed_at, updated_at
-                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s::jsonb, %s::jsonb, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
-                    """, data_tuple)
-                    new_count += 1
-
-            conn.commit()
+            bump_version(COINS)
             print("📊 Итоги сохранения:")
             print(f" ✅ Новых проектов: {new_count}")
             print(f" 🔄 Обновлено: {updated_count}")
@@ -288,45 +302,34 @@ class CryptoRankUpcomingParser:
 
         except Exception as e:
             print(f"❌ Ошибка сохранения: {e}")
-            conn.rollback()
-        finally:
-            cursor.close()
-            conn.close()
 
     def get_database_stats(self):
         """Показывает статистику по БД"""
-        conn = self.get_db_connection()
-        if not conn:
-            return
-
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
         try:
-            print("📊 Статистика базы данных:")
-            cursor.execute("SELECT * FROM get_upcoming_stats()")
-            stats = cursor.fetchone()
-            if stats:
-                print(f" 📈 Всего проектов: {stats['total_projects']}")
-                print(f" ✅ Активных: {stats['active_projects']}")
-                print(f" 📅 На этой неделе: {stats['this_week']}")
-                print(f" 🗓️ В этом месяце: {stats['this_month']}")
-                print(f" 💰 С капитализацией: {stats['with_initial_cap']}")
-                if stats['avg_moni_score']:
-                    print(f" ⭐ Средний Moni Score: {stats['avg_moni_score']}")
-
-            # Ближайшие проекты
-            cursor.execute("SELECT * FROM upcoming_soon LIMIT 5")
-            upcoming = cursor.fetchall()
-            if upcoming:
-                print(f"🚀 Ближайшие запуски:")
-                for project in upcoming:
-                    days = project['days_until_launch']
-                    print(f" • {project['project_name']} ({project['project_symbol']}) - через {days:.0f} дней")
+            with db_connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cursor:
+                print("📊 Статистика базы данных:")
+                cursor.execute("SELECT * FROM get_upcoming_stats()")
+                stats = cursor.fetchone()
+                if stats:
+                    print(f" 📈 Всего проектов: {stats['total_projects']}")
+                    print(f" ✅ Активных: {stats['active_projects']}")
+                    print(f" 📅 На этой неделе: {stats['this_week']}")
+                    print(f" 🗓️ В этом месяце: {stats['this_month']}")
+                    print(f" 💰 С капитализацией: {stats['with_initial_cap']}")
+                    if stats['avg_moni_score']:
+                        print(f" ⭐ Средний Moni Score: {stats['avg_moni_score']}")
+
+                # Ближайшие проекты
+                cursor.execute("SELECT * FROM upcoming_soon LIMIT 5")
+                upcoming = cursor.fetchall()
+                if upcoming:
+                    print(f"🚀 Ближайшие запуски:")
+                    for project in upcoming:
+                        days = project['days_until_launch']
+                        print(f" • {project['project_name']} ({project['project_symbol']}) - через {days:.0f} дней")
 
         except Exception as e:
             print(f"❌ Ошибка получения статистики: {e}")
-        finally:
-            cursor.close()
-            conn.close()
 
     def save_results(self, data, filename=None):
         """Сохранение результатов в JSON (опционально)"""
@@ -344,16 +347,15 @@ class CryptoRankUpcomingParser:
 
     def parse_table(self):
         """Парсинг таблицы"""
-        driver = None
         try:
             print(f"🌐 Загрузка: {self.upcoming_url}")
-            driver = self.setup_driver(headless=True)
-            driver.get(self.upcoming_url)
-            time.sleep(3)
-            driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)
+            with get_pool().lease(implicit_wait=10) as driver:
+                driver.get(self.upcoming_url)
+                wait_for(driver, (By.CSS_SELECTOR, "tr[role='row'] td a"), stage='upcoming.table')
+                driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                wait_for_dom_stable(driver, stage='upcoming.lazy_load')
 
-            projects = self.extract_projects(driver)
+                projects = self.extract_projects(driver)
 
             result = {
                 'source_url': self.upcoming_url,
@@ -368,16 +370,6 @@ class CryptoRankUpcomingParser:
             print(f"❌ Ошибка: {e}")
             return None
 
-        finally:
-            if driver is not None:
-                try:
-                    driver.quit()
-                except Exception as e:
-                    print(f"⚠️ Ошибка при driver.quit(): {e}")
-                # 🔥 Принудительное завершение процессов
-                os.system("killall -q chrome chromedriver 2>/dev/null || true")
-                print("🔒 Браузер закрыт (принудительно)")
-
     def main(self):
         """Главная функция парсера"""
         print("🚀 ПАРСЕР UPCOMING ICO ПРОЕКТОВ")
@@ -389,6 +381,7 @@ class CryptoRankUpcomingParser:
         parser = CryptoRankUpcomingParser()
         result = parser.parse_table()
 
+        report_latencies()
         if result:
             parser.save_to_database(result['projects'])
             parser.get_database_stats()
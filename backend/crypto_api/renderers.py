@@ -0,0 +1,134 @@
+# backend/crypto_api/renderers.py
+"""
+Форматы ответов для OHLC и списка монет (выбор по Accept или ?format=).
+
+    application/json                          — как раньше: список объектов
+    application/vnd.crypto.columnar+json      — ?format=columnar: массив на каждое поле, имена полей не повторяются
+    application/msgpack                       — ?format=msgpack: колоночный формат в MessagePack (если установлен msgpack)
+    application/vnd.apache.arrow.stream       — ?format=arrow: Arrow IPC, только OHLC (если установлен pyarrow)
+
+Список объектов берётся из ключа data (OHLC, индикаторы) или results (страница списка монет).
+"""
+import datetime
+import json
+from decimal import Decimal
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.settings import api_settings
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+# Ключи ответа, под которыми лежит список строк
+ROW_KEYS = ('data', 'results')
+
+
+def to_columns(rows):
+    """[{поле: значение}, ...] → {поле: [значения]}; порядок полей — как в первой строке"""
+    if not rows:
+        return {}
+    return {name: [row.get(name) for row in rows] for name in rows[0]}
+
+
+def is_rows(value):
+    return isinstance(value, list) and bool(value) and all(isinstance(row, dict) for row in value)
+
+
+def columnar(data):
+    """Заменяет списки строк в ответе на колонки; ошибки и прочие ответы не трогает"""
+    if is_rows(data):
+        return to_columns(data)
+    if isinstance(data, dict):
+        return {key: to_columns(value) if key in ROW_KEYS and isinstance(value, list) else value
+                for key, value in data.items()}
+    return data
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    """JSON с колонками вместо списка объектов"""
+    media_type = 'application/vnd.crypto.columnar+json'
+    format = 'columnar'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return super().render(columnar(data), accepted_media_type, renderer_context)
+
+
+def _msgpack_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    raise TypeError(f"Тип {type(value).__name__} не поддерживается MessagePack")
+
+
+class MessagePackRenderer(BaseRenderer):
+    """Колоночный ответ в MessagePack: без текстового представления чисел"""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(columnar(data), default=_msgpack_default, use_bin_type=True)
+
+
+class ArrowStreamRenderer(BaseRenderer):
+    """
+    Таблица OHLC в формате Arrow IPC (stream). Колонки data (или series по монетам с колонкой symbol),
+    остальные поля ответа (symbol, interval) — в метаданных схемы. Прочие ответы (ошибки) — одна строка JSON.
+    """
+    media_type = 'application/vnd.apache.arrow.stream'
+    format = 'arrow'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        columns, metadata = self.table_columns(data)
+        arrays = {name: pa.array([float(value) if isinstance(value, Decimal) else value for value in values])
+                  for name, values in columns.items()}
+        table = pa.table(arrays).replace_schema_metadata(metadata)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
+
+    @staticmethod
+    def table_columns(data):
+        if isinstance(data, dict) and isinstance(data.get('series'), dict):
+            columns = {}
+            for symbol, series in data['series'].items():
+                length = len(next(iter(series.values()), []))
+                columns.setdefault('symbol', []).extend([symbol] * length)
+                for name, values in series.items():
+                    columns.setdefault(name, []).extend(values)
+            rest = {key: value for key, value in data.items() if key != 'series'}
+        elif isinstance(data, dict) and isinstance(data.get('data'), list):
+            columns = to_columns(data['data'])
+            rest = {key: value for key, value in data.items() if key != 'data'}
+        else:
+            columns = {'json': [json.dumps(data, ensure_ascii=False, default=str)]}
+            rest = {}
+        return columns, {key: json.dumps(value, ensure_ascii=False, default=str) for key, value in rest.items()}
+
+
+def available_renderers(*extra):
+    """Рендереры по умолчанию, колоночный JSON и установленные бинарные форматы из extra"""
+    installed = {MessagePackRenderer: msgpack, ArrowStreamRenderer: pa}
+    return (list(api_settings.DEFAULT_RENDERER_CLASSES) + [ColumnarJSONRenderer]
+            + [renderer for renderer in extra if installed.get(renderer) is not None])
+
+
+# Список монет: строки содержат вложенные JSON-поля, поэтому без Arrow
+COIN_RENDERERS = available_renderers(MessagePackRenderer)
+OHLC_RENDERERS = available_renderers(MessagePackRenderer, ArrowStreamRenderer)
@@ -0,0 +1,76 @@
+# backend/crypto_api/search.py
+"""
+Поиск проектов по названию, символу, launchpad-платформам и инвесторам.
+
+Полнотекстовая часть ищет по префиксам слов ('bina lab' → 'bina:* & lab:*'), нечёткая — по сходству
+триграмм (опечатки, неполные названия). Обе обслуживаются GIN-индексами из db_init/08_search.sql.
+Инвесторы берутся из project_investors; совпадение по инвестору весит меньше совпадения по самому проекту.
+"""
+import re
+
+from django.db import connection
+
+# Слова запроса для tsquery: буквы и цифры (подчёркивание и знаки — разделители)
+WORD_RE = re.compile(r'[^\W_]+')
+
+# Совпадение только по инвестору ранжируется ниже совпадения по проекту
+INVESTOR_WEIGHT = 0.8
+
+SEARCH_SQL = """
+WITH q AS (
+    SELECT to_tsquery('simple', %(tsquery)s) AS tsq, %(text)s::text AS text
+),
+matches AS (
+    SELECT u.id,
+           GREATEST(
+               ts_rank(project_search_document(u.project_name, u.project_symbol, u.launchpad), q.tsq),
+               similarity(lower(u.project_name), q.text),
+               similarity(lower(u.project_symbol), q.text)
+           ) AS score,
+           NULL::text AS investor
+    FROM cryptorank_upcoming u, q
+    WHERE project_search_document(u.project_name, u.project_symbol, u.launchpad) @@ q.tsq
+       OR lower(u.project_name) %% q.text
+       OR lower(u.project_symbol) %% q.text
+    UNION ALL
+    SELECT pi.project_id,
+           MAX(GREATEST(ts_rank(to_tsvector('simple', pi.investor), q.tsq), similarity(lower(pi.investor), q.text)))
+               * %(investor_weight)s,
+           (array_agg(pi.investor ORDER BY similarity(lower(pi.investor), q.text) DESC))[1]
+    FROM project_investors pi, q
+    WHERE to_tsvector('simple', pi.investor) @@ q.tsq
+       OR lower(pi.investor) %% q.text
+    GROUP BY pi.project_id
+)
+SELECT u.id, u.project_name, u.project_symbol, u.project_url, u.launch_date,
+       ROUND(MAX(m.score)::numeric, 4) AS score,
+       MAX(m.investor) AS investor
+FROM matches m
+JOIN cryptorank_upcoming u ON u.id = m.id
+GROUP BY u.id
+ORDER BY lower(u.project_symbol) = %(text)s DESC, MAX(m.score) DESC, u.id
+LIMIT %(limit)s
+"""
+
+
+def prefix_tsquery(text):
+    """Текст запроса → tsquery, где каждое слово — префикс"""
+    return ' & '.join(f"{word}:*" for word in WORD_RE.findall(text.lower()))
+
+
+def search_projects(query, limit=20):
+    """
+    Проекты по запросу, лучшие сначала (точное совпадение символа — первым).
+    :return: список dict: id, project_name, project_symbol, project_url, launch_date, score,
+             investor — инвестор, по которому найден проект (если найден по инвестору)
+    """
+    text = ' '.join(query.lower().split())
+    with connection.cursor() as cursor:
+        cursor.execute(SEARCH_SQL, {
+            'tsquery': prefix_tsquery(text),
+            'text': text,
+            'investor_weight': INVESTOR_WEIGHT,
+            'limit': limit,
+        })
+        columns = [col[0] for col in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
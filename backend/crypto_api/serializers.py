@@ -1,10 +1,44 @@
 # backend/crypto_api/serializers.py
 from rest_framework import serializers
-from .models import UpcomingCrypto
+from .models import TokenomicsDetailed, UpcomingCrypto
 
-class UpcomingCryptoSerializer(serializers.ModelSerializer):
-    tokenomics = serializers.JSONField(read_only=True, required=False, allow_null=True)
+class SparseFieldsMixin:
+    """
+    Ограничивает набор полей по параметрам запроса:
+    ?fields=id,project_name — только перечисленные, ?omit=investors,launchpad — все, кроме перечисленных
+    """
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None:
+            return
+        fields = request.query_params.get('fields')
+        omit = request.query_params.get('omit')
+        if fields:
+            keep = {name.strip() for name in fields.split(',')}
+            for name in set(self.fields) - keep:
+                self.fields.pop(name)
+        if omit:
+            for name in {name.strip() for name in omit.split(',')}:
+                self.fields.pop(name, None)
+
+
+class UpcomingCryptoSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = UpcomingCrypto
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+
+class UpcomingCryptoWithTokenomicsSerializer(UpcomingCryptoSerializer):
+    """
+    Монета со встроенной токеномикой.
+    Queryset должен делать select_related('tokenomics_entry'), иначе на каждую монету уйдёт отдельный запрос
+    """
+    tokenomics = serializers.JSONField(source='tokenomics_entry.tokenomics', read_only=True, default=None)
+
+
+class TokenomicsDetailedSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = TokenomicsDetailed
+        fields = '__all__'
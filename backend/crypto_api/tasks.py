@@ -1,7 +1,34 @@
 # backend/crypto_api/tasks.py
-from celery import shared_task
+"""
+Celery-пайплайн парсинга.
+
+run_full_parsing_pipeline собирает цепочку:
+    upcoming → (страница каждого проекта ‖ история каждой монеты) → итоги
+
+Этап upcoming идёт первым, потому что от него зависят списки проектов и монет.
+Дальше каждый проект и каждая монета — отдельная задача в очереди scraping, поэтому
+их разбирают все запущенные celery_worker параллельно, а медленный проект не держит остальные.
+Число процессов на воркер задаётся при запуске (-c), число воркеров — масштабированием контейнеров.
+"""
+import os
+
+from celery import chain, chord, group, shared_task
+from celery.signals import worker_process_shutdown
 from django.core.management import call_command
 
+# Ограничение частоты задач, открывающих страницы cryptorank (на каждый воркер)
+SCRAPE_RATE_LIMIT = os.environ.get('CELERY_SCRAPE_RATE_LIMIT', '20/m')
+
+
+@worker_process_shutdown.connect
+def close_process_pools(**kwargs):
+    """Процессы prefork-воркера завершаются без atexit: браузеры и соединения с БД закрываем явно"""
+    from crypto_api.parsers.db_pool import shutdown_db_pool
+    from crypto_api.parsers.driver_pool import shutdown_pool
+
+    shutdown_pool()
+    shutdown_db_pool()
+
 
 @shared_task
 def run_full_parsing_pipeline():
@@ -11,9 +38,115 @@ def run_full_parsing_pipeline():
     """
     print("🚀 ЗАПУСК ПАЙПЛАЙНА ЧЕРЕЗ CELERY")
     try:
-        call_command('run_parsers')
-        print("✅ Пайплайн завершён")
-        return "Parsing completed"
+        result = chain(run_upcoming_task.si(), dispatch_scraping_tasks.si()).apply_async()
+        print(f"✅ Пайплайн поставлен в очередь: {result.id}")
+        return result.id
     except Exception as e:
         print(f"❌ Ошибка: {e}")
-        return f"Error: {str(e)}"
\ No newline at end of file
+        return f"Error: {str(e)}"
+
+
+@shared_task
+def run_sequential_pipeline():
+    """Прежний последовательный прогон всех парсеров в одном процессе (для отладки)"""
+    call_command('run_parsers')
+    return "Parsing completed"
+
+
+@shared_task
+def run_upcoming_task():
+    """Этап 1: таблица upcoming-проектов — источник проектов и монет для следующих этапов"""
+    from crypto_api.parsers.upcoming import main as run_upcoming
+
+    run_upcoming()
+    return "upcoming"
+
+
+@shared_task
+def dispatch_scraping_tasks():
+    """Этап 2: по задаче на каждый проект и каждую монету, итоги — после завершения всех"""
+    from crypto_api.parsers import historical_data, investors
+
+    projects = investors.get_projects_from_db(20)
+    coins = historical_data.get_coins_from_db()
+    # Схему создаём один раз здесь, а не в каждой задаче монеты
+    historical_data.ensure_ohlc_schema()
+
+    tasks = [scan_project_task.s(project) for project in projects]
+    tasks += [scrape_coin_task.s(symbol, url) for symbol, url in coins]
+    if not tasks:
+        print("❌ Нет проектов и монет для обработки")
+        return {'projects': 0, 'coins': 0}
+
+    print(f"🧩 Поставлено задач: проектов {len(projects)}, монет {len(coins)}")
+    chord(group(tasks), finish_scraping_task.s()).apply_async()
+    return {'projects': len(projects), 'coins': len(coins)}
+
+
+@shared_task(rate_limit=SCRAPE_RATE_LIMIT)
+def scan_project_task(project):
+    """Инвесторы, launchpad-платформы и токеномика одного проекта за одну загрузку страницы"""
+    from crypto_api.parsers import investors, launchpads
+    from crypto_api.parsers.driver_pool import get_pool
+    from crypto_api.parsers.project_page import default_extractors, save_results, visit_project
+
+    # Ошибка одной задачи не должна ронять chord: итоговая задача получит её в сводке
+    try:
+        extractors = default_extractors()
+        with get_pool().lease(implicit_wait=5) as driver:
+            results = visit_project(driver, project, extractors)
+        saved = save_results(project, extractors, results)
+        # Соединение писателя остаётся открытым между задачами процесса воркера
+        investors.get_writer().flush()
+
+        # В последовательном режиме launchpad пишутся пачкой в finish(); здесь проект — сам себе пачка
+        platforms = saved.get('launchpads')
+        if platforms:
+            launchpads.update_launchpads_in_db(launchpads.remove_duplicates(platforms))
+    except Exception as e:
+        print(f"❌ Ошибка проекта {project['name']}: {e}")
+        return {'kind': 'project', 'name': project['name'], 'error': str(e), 'results': {}}
+
+    return {
+        'kind': 'project',
+        'name': project['name'],
+        'results': {name: len(result) if isinstance(result, list) else 1 for name, result in saved.items()},
+    }
+
+
+@shared_task(rate_limit=SCRAPE_RATE_LIMIT)
+def scrape_coin_task(symbol, url):
+    """История OHLC одной монеты"""
+    from crypto_api.parsers.historical_data import scrape_coin
+
+    try:
+        rows = scrape_coin(symbol, url)
+    except Exception as e:
+        print(f"❌ Ошибка монеты {symbol}: {e}")
+        return {'kind': 'coin', 'name': symbol, 'error': str(e), 'rows': 0}
+    # None — монета уже актуальна, страница не открывалась
+    return {'kind': 'coin', 'name': symbol, 'rows': rows or 0, 'skipped': rows is None}
+
+
+@shared_task
+def finish_scraping_task(results):
+    """Этап 3: пересчёт tokenomics_detailed и сводка по всем задачам проектов и монет"""
+    from crypto_api.parsers.tokenomics import refresh_tokenomics_detailed
+
+    projects = [result for result in results if result and result.get('kind') == 'project']
+    coins = [result for result in results if result and result.get('kind') == 'coin']
+    # Задачи проектов пишут токеномику по одной; представление пересчитываем один раз на прогон
+    if any('tokenomics' in result['results'] for result in projects):
+        refresh_tokenomics_detailed()
+    print("\n📊 ИТОГИ ПАЙПЛАЙНА")
+    print(f"   📁 Проектов обработано: {len(projects)}")
+    for name in ('launchpads', 'tokenomics', 'investors'):
+        found = sum(1 for result in projects if name in result['results'])
+        print(f"      {name}: данные найдены у {found}")
+    skipped = sum(1 for result in coins if result.get('skipped'))
+    print(f"   📈 Монет обработано: {len(coins)} (уже актуальны: {skipped}), строк OHLC: {sum(result['rows'] for result in coins)}")
+    failed = [result['name'] for result in projects + coins if result.get('error')]
+    if failed:
+        print(f"   ⚠️ С ошибками: {', '.join(failed)}")
+    print("✅ Пайплайн завершён")
+    return {'projects': len(projects), 'coins': len(coins)}
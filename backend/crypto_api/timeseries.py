@@ -0,0 +1,55 @@
+# backend/crypto_api/timeseries.py
+"""
+Обработка временных рядов для API графиков.
+"""
+
+
+def lttb(points, threshold, value):
+    """
+    Прореживание ряда методом Largest-Triangle-Three-Buckets.
+    Первая и последняя точки сохраняются; из каждой из остальных threshold - 2 корзин берётся точка,
+    образующая наибольший треугольник с уже выбранной точкой и средним следующей корзины,
+    поэтому пики и провалы не сглаживаются, как при усреднении.
+    :param points: упорядоченный по времени список (строки возвращаются как есть)
+    :param threshold: максимальное число точек в результате
+    :param value: value(point) -> число или None; None заменяется предыдущим значением
+    """
+    count = len(points)
+    if threshold >= count or count <= 2:
+        return list(points)
+    if threshold < 3:
+        return [points[0], points[-1]][:threshold]
+
+    # x — позиция в ряду: дневные свечи идут с постоянным шагом
+    ys = []
+    previous = 0.0
+    for point in points:
+        y = value(point)
+        previous = float(y) if y is not None else previous
+        ys.append(previous)
+
+    sampled = [points[0]]
+    every = (count - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        bucket_start = int(i * every) + 1
+        bucket_end = int((i + 1) * every) + 1
+
+        # Среднее следующей корзины (для последней — сама последняя точка)
+        next_start = bucket_end
+        next_end = min(int((i + 2) * every) + 1, count)
+        if next_start >= next_end:
+            next_start, next_end = count - 1, count
+        avg_x = (next_start + next_end - 1) / 2
+        avg_y = sum(ys[next_start:next_end]) / (next_end - next_start)
+
+        best, best_area = bucket_start, -1.0
+        for j in range(bucket_start, bucket_end):
+            area = abs((a - avg_x) * (ys[j] - ys[a]) - (a - j) * (avg_y - ys[a]))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(points[best])
+        a = best
+
+    sampled.append(points[-1])
+    return sampled
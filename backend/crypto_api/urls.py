@@ -4,9 +4,14 @@ from . import views
 
 urlpatterns = [
     path('coins/', views.CryptoListAPIView.as_view(), name='coin-list'),
+    path('coins/with-tokenomics/', views.CryptoWithTokenomicsListAPIView.as_view(), name='coin-list-tokenomics'),
     path('coins/<int:id>/', views.CryptoDetailAPIView.as_view(), name='coin-detail'),
     path('tokenomics-detailed/', views.TokenomicsDetailedView.as_view(), name='tokenomics-detailed'),
+    path('ohlc/', views.OHLCBatchView.as_view(), name='ohlc-batch'),
     path('ohlc/<str:symbol>/', views.OHLCDataView.as_view(), name='ohlc-data'),
+    path('indicators/<str:symbol>/', views.IndicatorsView.as_view(), name='indicators'),
+    path('search/', views.SearchView.as_view(), name='search'),
+    path('analytics/', views.CrossCoinAnalyticsView.as_view(), name='analytics'),
     path('trigger-parsing/', views.trigger_parsing, name='trigger-parsing'),
     path('', views.api_root, name='api-root'),
 ]
\ No newline at end of file
@@ -1,127 +1,447 @@
 # backend/crypto_api/views.py
+from itertools import groupby
+from operator import itemgetter
 
 from rest_framework import generics
 from rest_framework.decorators import api_view
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import OrderingFilter
 from rest_framework.response import Response
-from django.http import HttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+from django.http import HttpResponse, StreamingHttpResponse
 from django.db import connection
-from .models import UpcomingCrypto
-from .serializers import UpcomingCryptoSerializer
+from django.utils.dateparse import parse_date
+from .analytics import cross_coin_analytics
+from .cache import COINS, OHLC, TOKENOMICS, cached_response
+from .indicators import INDICATOR_COLUMNS
+from .models import TokenomicsDetailed, UpcomingCrypto
+from .pagination import CoinCursorPagination, TokenomicsCursorPagination
+from .renderers import COIN_RENDERERS, OHLC_RENDERERS
+from .search import search_projects
+from .serializers import TokenomicsDetailedSerializer, UpcomingCryptoSerializer, UpcomingCryptoWithTokenomicsSerializer
 from .tasks import run_full_parsing_pipeline
+from .timeseries import lttb
 
 
 # --- API: Список монет ---
 class CryptoListAPIView(generics.ListAPIView):
     """
-    Возвращает список всех upcoming-проектов
+    Возвращает список upcoming-проектов постранично (курсор).
+    Фильтры: ids (через запятую), launch_date_after, launch_date_before, project_type, moni_score,
+    launchpad (содержит платформу).
+    Сортировка: ?ordering=id|project_name|updated_at|parsed_at (с минусом — по убыванию);
+    последним ключом всегда идёт id, курсор хранит значения всех ключей (см. KeysetCursorPagination).
+    Поля: ?fields=... или ?omit=investors,launchpad, чтобы не тянуть тяжёлые JSON-колонки.
     """
     queryset = UpcomingCrypto.objects.all()
     serializer_class = UpcomingCryptoSerializer
+    pagination_class = CoinCursorPagination
+    renderer_classes = COIN_RENDERERS
+    filter_backends = [OrderingFilter]
+    # Только NOT NULL поля: курсор не умеет позиционироваться по NULL
+    ordering_fields = ['id', 'project_name', 'updated_at', 'parsed_at']
+    ordering = ['id']
+
+    @cached_response(COINS)
+    def get(self, request, *args, **kwargs):
+        return self.list(request, *args, **kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        params = self.request.query_params
+
+        if params.get('ids'):
+            try:
+                ids = [int(value) for value in params['ids'].split(',') if value.strip()]
+            except ValueError:
+                raise ValidationError({'ids': 'Ожидается список целых чисел через запятую'})
+            queryset = queryset.filter(id__in=ids)
+
+        for param, lookup in (('launch_date_after', 'launch_date__gte'), ('launch_date_before', 'launch_date__lte')):
+            value = params.get(param)
+            if value:
+                date = parse_date(value)
+                if date is None:
+                    raise ValidationError({param: 'Ожидается дата в формате YYYY-MM-DD'})
+                queryset = queryset.filter(**{lookup: date})
+
+        if params.get('project_type'):
+            queryset = queryset.filter(project_type=params['project_type'])
+        if params.get('moni_score'):
+            queryset = queryset.filter(moni_score=params['moni_score'])
+        if params.get('launchpad'):
+            # jsonb @> — использует GIN-индекс по launchpad
+            queryset = queryset.filter(launchpad__contains=[params['launchpad']])
+
+        # Не читаем из БД колонки, которые не попадут в ответ
+        omit = {name.strip() for name in params.get('omit', '').split(',') if name.strip()}
+        fields = {name.strip() for name in params.get('fields', '').split(',') if name.strip()}
+        heavy = {'investors', 'launchpad'}
+        skipped = heavy & omit
+        if fields:
+            skipped |= heavy - fields
+        if skipped:
+            queryset = queryset.defer(*skipped)
+        return queryset
+
+
+# --- API: Монеты с токеномикой ---
+class CryptoWithTokenomicsListAPIView(CryptoListAPIView):
+    """
+    Тот же список монет (фильтры, сортировка, курсор), но с токеномикой каждой монеты.
+    Токеномика подтягивается JOIN-ом в том же запросе, что и монеты.
+    Пакетная выборка: ?ids=1,2,3
+    """
+    queryset = UpcomingCrypto.objects.select_related('tokenomics_entry')
+    serializer_class = UpcomingCryptoWithTokenomicsSerializer
+
+    @cached_response(COINS, TOKENOMICS)
+    def get(self, request, *args, **kwargs):
+        return self.list(request, *args, **kwargs)
 
 
 # --- API: Детали монеты ---
 class CryptoDetailAPIView(generics.RetrieveAPIView):
     """
-    Возвращает детали монеты по ID, включая токеномику из отдельной таблицы
+    Возвращает детали монеты по ID, включая токеномику из отдельной таблицы (один запрос с JOIN)
     """
-    queryset = UpcomingCrypto.objects.all()
-    serializer_class = UpcomingCryptoSerializer
+    queryset = UpcomingCrypto.objects.select_related('tokenomics_entry')
+    serializer_class = UpcomingCryptoWithTokenomicsSerializer
     lookup_field = 'id'
 
-    def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
-        data = self.get_serializer(instance).data
-
-        # Добавляем токеномику из таблицы cryptorank_tokenomics
-        with connection.cursor() as cursor:
-            cursor.execute(
-                "SELECT tokenomics FROM cryptorank_tokenomics WHERE project_name = %s",
-                [instance.project_name]
-            )
-            row = cursor.fetchone()
-            if row:
-                # Если tokenomics строка — парсим
-                tokenomics_data = row[0]
-                if isinstance(tokenomics_data, str):
-                    import json
-                    try:
-                        tokenomics_data = json.loads(tokenomics_data)
-                    except:
-                        tokenomics_data = None
-                data['tokenomics'] = tokenomics_data
-            else:
-                data['tokenomics'] = None
-
-        return Response(data)
+    @cached_response(COINS, TOKENOMICS)
+    def get(self, request, *args, **kwargs):
+        return self.retrieve(request, *args, **kwargs)
 
 
 # --- API: Токеномика (вся таблица) ---
 class TokenomicsDetailedView(generics.ListAPIView):
     """
-    Возвращает данные из вьюшки tokenomics_detailed
+    Возвращает токеномику из материализованного представления tokenomics_detailed постранично (курсор).
+    Свежие записи сначала; ?page_size=..., ?fields=... как у списка монет.
     """
+    queryset = TokenomicsDetailed.objects.all()
+    serializer_class = TokenomicsDetailedSerializer
+    pagination_class = TokenomicsCursorPagination
 
-    def get_queryset(self):
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT * FROM tokenomics_detailed")
-            columns = [col[0] for col in cursor.description]
-            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+    @cached_response(TOKENOMICS)
+    def get(self, request, *args, **kwargs):
+        return self.list(request, *args, **kwargs)
+
+
+# --- API: OHLC (чтение из единой таблицы ohlc) ---
+# Строк в одной порции потокового ответа: столько держится в памяти на запрос
+OHLC_STREAM_CHUNK_SIZE = 1000
+# Монет в одном запросе /api/ohlc/?symbols=
+OHLC_BATCH_MAX_SYMBOLS = 100
 
-    def list(self, request, *args, **kwargs):
-        return Response(self.get_queryset())
+# Интервалы свечей: ключ — значение ?interval=, значение — единица date_trunc (None — дневные строки как есть)
+OHLC_INTERVALS = {
+    '1d': None,
+    '1w': 'week',
+    '1M': 'month',
+}
+
+OHLC_COLUMNS = """
+    date,
+    open_price,
+    high_price,
+    low_price,
+    close_price,
+    volume_usd as volume,
+    change_percent,
+    market_cap
+"""
+
+# Свеча интервала из дневных строк: open — первый, close и market_cap — последний известный,
+# change_percent — изменение close к предыдущей свече (у первой свечи выборки — NULL)
+OHLC_RESAMPLED_SQL = """
+SELECT
+    {symbol}bucket as date,
+    open_price,
+    high_price,
+    low_price,
+    close_price,
+    volume,
+    ROUND((close_price / NULLIF(LAG(close_price) OVER (PARTITION BY symbol ORDER BY bucket), 0) - 1) * 100, 6)
+        as change_percent,
+    market_cap
+FROM (
+    SELECT
+        symbol,
+        date_trunc(%s, date)::date as bucket,
+        (array_agg(open_price ORDER BY date) FILTER (WHERE open_price IS NOT NULL))[1] as open_price,
+        MAX(high_price) as high_price,
+        MIN(low_price) as low_price,
+        (array_agg(close_price ORDER BY date DESC) FILTER (WHERE close_price IS NOT NULL))[1] as close_price,
+        SUM(volume_usd) as volume,
+        (array_agg(market_cap ORDER BY date DESC) FILTER (WHERE market_cap IS NOT NULL))[1] as market_cap
+    FROM ohlc
+    WHERE {where}
+    GROUP BY symbol, bucket
+) buckets
+ORDER BY symbol, bucket ASC
+"""
+
+
+def positive_int(params, name):
+    """Положительное целое из query-параметра name или None, если параметр не передан"""
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        value = int(value)
+        if value <= 0:
+            raise ValueError(value)
+    except ValueError:
+        raise ValidationError({name: 'Ожидается положительное целое число'})
+    return value
+
+
+def symbol_date_filter(symbol, params):
+    """WHERE по символу (или списку символов) и датам from, to (включительно, YYYY-MM-DD) и его параметры"""
+    if isinstance(symbol, str):
+        conditions = ["symbol = %s"]
+    else:
+        conditions = ["symbol = ANY(%s)"]
+        symbol = list(symbol)
+    args = [symbol]
+    for param, operator in (('from', '>='), ('to', '<=')):
+        value = params.get(param)
+        if value:
+            try:
+                date = parse_date(value)
+            except ValueError:
+                date = None
+            if date is None:
+                raise ValidationError({param: 'Ожидается дата в формате YYYY-MM-DD'})
+            conditions.append(f"date {operator} %s")
+            args.append(date)
+    return ' AND '.join(conditions), args
+
+
+def ohlc_interval(params):
+    """Значение ?interval= (по умолчанию 1d)"""
+    interval = params.get('interval') or '1d'
+    if interval not in OHLC_INTERVALS:
+        raise ValidationError({'interval': f"Допустимые значения: {', '.join(OHLC_INTERVALS)}"})
+    return interval
+
+
+def ohlc_query(symbol, params):
+    """
+    SQL и параметры выборки OHLC монеты по query-параметрам:
+    from, to — границы по дате включительно (YYYY-MM-DD), interval — 1d|1w|1M (свечи агрегируются в SQL),
+    limit — не больше N свечей начиная с самой ранней.
+    Для списка символов — все ряды одним запросом: первой колонкой идёт symbol, limit не поддерживается.
+    """
+    where, args = symbol_date_filter(symbol, params)
+    symbol_column = '' if isinstance(symbol, str) else 'symbol, '
+    unit = OHLC_INTERVALS[ohlc_interval(params)]
+    if unit is None:
+        sql = f"SELECT {symbol_column}{OHLC_COLUMNS} FROM ohlc WHERE {where} ORDER BY {symbol_column}date ASC"
+    else:
+        sql = OHLC_RESAMPLED_SQL.format(symbol=symbol_column, where=where)
+        args.insert(0, unit)
+
+    limit = positive_int(params, 'limit')
+    if limit:
+        if symbol_column:
+            raise ValidationError({'limit': 'Не поддерживается для нескольких монет: используйте from/to'})
+        sql += " LIMIT %s"
+        args.append(limit)
+    return sql, args
+
+
+def stream_ohlc_json(symbol, interval, cursor, columns, rows):
+    """
+    Отдаёт {"symbol": ..., "interval": ..., "data": [...]} по частям, дочитывая серверный курсор порциями.
+    rows — уже прочитанная первая порция; курсор закрывается по окончании или обрыве ответа.
+    """
+    encoder = JSONEncoder(ensure_ascii=False)
+    try:
+        yield '{"symbol": %s, "interval": %s, "data": [' % (encoder.encode(symbol), encoder.encode(interval))
+        separator = ''
+        while rows:
+            yield separator + ','.join(encoder.encode(dict(zip(columns, row))) for row in rows)
+            separator = ','
+            rows = cursor.fetchmany(OHLC_STREAM_CHUNK_SIZE)
+        yield ']}'
+    finally:
+        cursor.close()
 
 
-# --- API: OHLC (чтение из ohlc_<symbol>) ---
 class OHLCDataView(generics.GenericAPIView):
     """
-    Возвращает OHLC-данные из таблицы ohlc_<symbol>
+    Возвращает OHLC-данные монеты из таблицы ohlc
     Использует колонку `date`, а не `timestamp`
+    Фильтры: from, to, interval, limit (см. ohlc_query).
+    ?max_points=N — не больше N точек: ряд прореживается LTTB по close, форма графика сохраняется.
+    ?stream=1 — потоковый ответ через серверный курсор: в памяти не больше OHLC_STREAM_CHUNK_SIZE строк,
+    сколько бы ни было истории. Такой ответ не кэшируется в Redis, но ETag/304 работают; формат — всегда JSON.
+    Формат ответа — по Accept или ?format= (см. crypto_api/renderers.py).
     """
+    renderer_classes = OHLC_RENDERERS
 
+    @cached_response(OHLC)
     def get(self, request, symbol):
-        symbol_lower = symbol.strip().lower()
-        table_name = f"ohlc_{symbol_lower}"
+        symbol_upper = symbol.strip().upper()
+        params = request.query_params
+        sql, args = ohlc_query(symbol_upper, params)
+        max_points = positive_int(params, 'max_points')
+
+        if params.get('stream') in ('1', 'true'):
+            if max_points:
+                raise ValidationError({'max_points': 'Не сочетается с stream: прореживанию нужен весь ряд'})
+            return self.stream(symbol_upper, ohlc_interval(params), sql, args)
 
         with connection.cursor() as cursor:
-            # Проверяем, существует ли таблица
-            cursor.execute("""
-                SELECT EXISTS (
-                    SELECT FROM information_schema.tables 
-                    WHERE table_name = %s
-                );
-            """, [table_name])
-
-            if not cursor.fetchone()[0]:
-                return Response({
-                    "symbol": symbol.upper(),
-                    "data": []
-                })
-
-            # Читаем данные, конвертируя date в строку
-            cursor.execute(f"""
-                SELECT 
-                    date::text as date,
-                    open_price,
-                    high_price,
-                    low_price,
-                    close_price,
-                    volume_usd as volume,
-                    change_percent,
-                    market_cap
-                FROM {table_name}
-                ORDER BY date ASC
-            """)
+            cursor.execute(sql, args)
+            columns = [col[0] for col in cursor.description]
+            rows = cursor.fetchall()
+        if max_points:
+            rows = lttb(rows, max_points, value=lambda row: row[columns.index('close_price')])
+        data = [dict(zip(columns, row)) for row in rows]
 
+        return Response({
+            "symbol": symbol_upper,
+            "interval": ohlc_interval(params),
+            "data": data
+        })
+
+    def stream(self, symbol, interval, sql, args):
+        # Именованный (серверный) курсор: строки приходят из Postgres порциями, а не все сразу.
+        # Первую порцию читаем до начала ответа, чтобы ошибка запроса вернулась обычным 500, а не оборванным JSON
+        cursor = connection.chunked_cursor()
+        try:
+            cursor.execute(sql, args)
+            rows = cursor.fetchmany(OHLC_STREAM_CHUNK_SIZE)
             columns = [col[0] for col in cursor.description]
+        except Exception:
+            cursor.close()
+            raise
+        return StreamingHttpResponse(
+            stream_ohlc_json(symbol, interval, cursor, columns, rows),
+            content_type='application/json'
+        )
+
+
+class OHLCBatchView(generics.GenericAPIView):
+    """
+    OHLC нескольких монет одним запросом к БД: ?symbols=BTC,ETH,...
+    Фильтры from, to, interval и max_points — как у OHLCDataView (прореживание — для каждого ряда отдельно).
+    Формат колоночный: {"series": {"BTC": {"date": [...], "close_price": [...], ...}}} —
+    имена полей не повторяются в каждой строке. Монеты без данных в ответ не попадают.
+    """
+    renderer_classes = OHLC_RENDERERS
+
+    @cached_response(OHLC)
+    def get(self, request):
+        params = request.query_params
+        symbols = sorted({symbol.strip().upper() for symbol in params.get('symbols', '').split(',') if symbol.strip()})
+        if not symbols:
+            raise ValidationError({'symbols': 'Укажите монеты через запятую'})
+        if len(symbols) > OHLC_BATCH_MAX_SYMBOLS:
+            raise ValidationError({'symbols': f'Не больше {OHLC_BATCH_MAX_SYMBOLS} монет за запрос'})
+        sql, args = ohlc_query(symbols, params)
+        max_points = positive_int(params, 'max_points')
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, args)
+            columns = [col[0] for col in cursor.description][1:]
             rows = cursor.fetchall()
-            data = [dict(zip(columns, row)) for row in rows]
+
+        close_index = columns.index('close_price') + 1
+        series = {}
+        for symbol, symbol_rows in groupby(rows, key=itemgetter(0)):
+            symbol_rows = list(symbol_rows)
+            if max_points:
+                symbol_rows = lttb(symbol_rows, max_points, value=itemgetter(close_index))
+            fields = [list(values) for values in zip(*symbol_rows)]
+            series[symbol] = dict(zip(columns, fields[1:]))
+
+        return Response({
+            "interval": ohlc_interval(params),
+            "series": series
+        })
+
+
+# --- API: Индикаторы (таблица ohlc_indicators, см. crypto_api/indicators.py) ---
+class IndicatorsView(generics.GenericAPIView):
+    """
+    Возвращает посчитанные индикаторы монеты по дням: SMA, EMA, RSI, волатильность, просадку, доходности.
+    Фильтры: from, to, limit — как у OHLC.
+    """
+    renderer_classes = OHLC_RENDERERS
+
+    @cached_response(OHLC)
+    def get(self, request, symbol):
+        symbol_upper = symbol.strip().upper()
+        where, args = symbol_date_filter(symbol_upper, request.query_params)
+        sql = f"SELECT date, {', '.join(INDICATOR_COLUMNS)} FROM ohlc_indicators WHERE {where} ORDER BY date ASC"
+        limit = positive_int(request.query_params, 'limit')
+        if limit:
+            sql += " LIMIT %s"
+            args.append(limit)
+
+        with connection.cursor() as cursor:
+            cursor.execute(sql, args)
+            columns = [col[0] for col in cursor.description]
+            data = [dict(zip(columns, row)) for row in cursor.fetchall()]
 
         return Response({
-            "symbol": symbol.upper(),
+            "symbol": symbol_upper,
             "data": data
         })
 
 
+# --- API: Сравнение монет (crypto_api/analytics.py) ---
+# Предел окна: матрица монета × день строится в памяти
+ANALYTICS_MAX_DAYS = 3650
+
+
+class CrossCoinAnalyticsView(generics.GenericAPIView):
+    """
+    Корреляции доходностей, лидеры роста/падения и рейтинг по объёму сразу по всем монетам — одним ответом.
+    Параметры: days — окно в днях (по умолчанию 90, не больше ANALYTICS_MAX_DAYS), top — длина рейтингов
+    (по умолчанию 10), symbols — только перечисленные монеты через запятую.
+    """
+
+    @cached_response(OHLC)
+    def get(self, request):
+        params = request.query_params
+        days = positive_int(params, 'days') or 90
+        if days > ANALYTICS_MAX_DAYS:
+            raise ValidationError({'days': f'Не больше {ANALYTICS_MAX_DAYS}'})
+        top = positive_int(params, 'top') or 10
+        symbols = [symbol.strip().upper() for symbol in params.get('symbols', '').split(',') if symbol.strip()]
+        return Response(cross_coin_analytics(days, top, symbols))
+
+
+# --- API: Поиск проектов (crypto_api/search.py) ---
+SEARCH_MAX_LIMIT = 100
+
+
+class SearchView(generics.GenericAPIView):
+    """
+    Поиск проектов по названию, символу, инвесторам и launchpad: ?q=...&limit=20
+    Слова запроса ищутся как префиксы, опечатки находятся по сходству триграмм; лучшие совпадения сначала.
+    """
+
+    @cached_response(COINS)
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': 'Укажите строку поиска'})
+        limit = positive_int(request.query_params, 'limit') or 20
+        if limit > SEARCH_MAX_LIMIT:
+            raise ValidationError({'limit': f'Не больше {SEARCH_MAX_LIMIT}'})
+        return Response({
+            "query": query,
+            "results": search_projects(query, limit)
+        })
+
+
 # --- API: Запуск парсинга ---
 @api_view(['POST'])
 def trigger_parsing(request):
@@ -148,7 +468,11 @@ def api_root(request):
     <ul>
         <li><a href="/admin">Админка Django</a></li>
         <li><a href="/api/coins/">Список монет</a></li>
+        <li><a href="/api/coins/with-tokenomics/">Монеты с токеномикой</a></li>
         <li><a href="/api/tokenomics-detailed/">Детали токеномики</a></li>
+        <li><a href="/api/analytics/">Сравнение монет</a></li>
+        <li><a href="/api/search/?q=btc">Поиск проектов</a></li>
+        <li>/api/ohlc/&lt;symbol&gt;/ и /api/indicators/&lt;symbol&gt;/ — история цен и индикаторы монеты</li>
         <li><a href="/api/trigger-parsing/" target="_blank">Запустить парсинг</a></li>
     </ul>
     """)
\ No newline at end of file
@@ -1,5 +1,4 @@
 -- Удаляем все существующие вьюшки
-DROP VIEW IF EXISTS tokenomics_detailed CASCADE;
 DROP VIEW IF EXISTS tokenomics_summary CASCADE;
 DROP VIEW IF EXISTS crypto_issues CASCADE;
 DROP VIEW IF EXISTS crypto_without_social CASCADE;
@@ -28,25 +27,7 @@ WHERE is_active = TRUE
   AND launch_date <= CURRENT_DATE + INTERVAL '30 days'
 ORDER BY launch_date ASC;
 
--- Представление: детальная токеномика
-CREATE OR REPLACE VIEW tokenomics_detailed AS
-SELECT
-    t.project_name,
-    t.parsed_at,
-    t.tokenomics->'distribution' as distribution_data,
-    t.tokenomics->'initial_values'->>'Total supply' as total_supply,
-    t.tokenomics->'initial_values'->>'Circulating supply' as circulating_supply,
-    t.tokenomics->'initial_values'->>'Max supply' as max_supply,
-    t.tokenomics->'initial_values'->>'Initial price' as initial_price,
-    t.tokenomics->'initial_values'->>'Market cap' as market_cap,
-    (SELECT COUNT(*) FROM jsonb_object_keys(COALESCE(t.tokenomics->'distribution', '{}'::jsonb))) as categories_count,
-    CASE
-        WHEN (SELECT COUNT(*) FROM jsonb_object_keys(COALESCE(t.tokenomics->'distribution', '{}'::jsonb))) > 0 THEN 'Complete'
-        WHEN t.tokenomics->'initial_values' IS NOT NULL THEN 'Partial'
-        ELSE 'Minimal'
-    END as data_quality
-FROM cryptorank_tokenomics t
-ORDER BY t.parsed_at DESC;
+-- Детальная токеномика (tokenomics_detailed) — материализованное представление, см. 07_tokenomics_detailed.sql
 
 -- Представление: социальные ссылки
 CREATE OR REPLACE VIEW crypto_social_links AS
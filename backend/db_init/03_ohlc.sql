@@ -0,0 +1,90 @@
+-- Единая таблица OHLC для всех монет вместо ohlc_<symbol>
+-- Секционирование по хэшу символа; имена секций ohlc__pN не пересекаются с ohlc_<symbol>
+CREATE TABLE IF NOT EXISTS ohlc (
+    symbol VARCHAR(20) NOT NULL,
+    date DATE NOT NULL,
+    open_price NUMERIC(20,10),
+    high_price NUMERIC(20,10),
+    low_price NUMERIC(20,10),
+    med_price NUMERIC(20,10),
+    close_price NUMERIC(20,10),
+    change_percent NUMERIC(10,6),
+    volume_usd NUMERIC(30,10),
+    change_volume_percent NUMERIC(10,6),
+    market_cap NUMERIC(30,10),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (symbol, date)
+) PARTITION BY HASH (symbol);
+
+CREATE TABLE IF NOT EXISTS ohlc__p0 PARTITION OF ohlc FOR VALUES WITH (MODULUS 8, REMAINDER 0);
+CREATE TABLE IF NOT EXISTS ohlc__p1 PARTITION OF ohlc FOR VALUES WITH (MODULUS 8, REMAINDER 1);
+CREATE TABLE IF NOT EXISTS ohlc__p2 PARTITION OF ohlc FOR VALUES WITH (MODULUS 8, REMAINDER 2);
+CREATE TABLE IF NOT EXISTS ohlc__p3 PARTITION OF ohlc FOR VALUES WITH (MODULUS 8, REMAINDER 3);
+CREATE TABLE IF NOT EXISTS ohlc__p4 PARTITION OF ohlc FOR VALUES WITH (MODULUS 8, REMAINDER 4);
+CREATE TABLE IF NOT EXISTS ohlc__p5 PARTITION OF ohlc FOR VALUES WITH (MODULUS 8, REMAINDER 5);
+CREATE TABLE IF NOT EXISTS ohlc__p6 PARTITION OF ohlc FOR VALUES WITH (MODULUS 8, REMAINDER 6);
+CREATE TABLE IF NOT EXISTS ohlc__p7 PARTITION OF ohlc FOR VALUES WITH (MODULUS 8, REMAINDER 7);
+
+-- (symbol, date) покрыт первичным ключом; BRIN по дате — для выборок по диапазону дат сразу по всем монетам
+CREATE INDEX IF NOT EXISTS ohlc_date_brin ON ohlc USING BRIN (date);
+
+-- Перенос старых таблиц ohlc_<symbol> в ohlc (идемпотентно: на чистой БД ничего не делает)
+DO $$
+DECLARE
+    legacy RECORD;
+BEGIN
+    FOR legacy IN
+        SELECT c.relname
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE n.nspname = current_schema()
+          AND c.relkind = 'r'
+          AND NOT c.relispartition
+          AND c.relname LIKE 'ohlc\_%'
+          AND c.relname NOT LIKE 'ohlc\_\_%'
+          -- только таблицы старого формата: с колонкой med_price и без колонки symbol
+          AND EXISTS (SELECT 1 FROM pg_attribute a WHERE a.attrelid = c.oid AND a.attname = 'med_price')
+          AND NOT EXISTS (SELECT 1 FROM pg_attribute a WHERE a.attrelid = c.oid AND a.attname = 'symbol')
+    LOOP
+        EXECUTE format(
+            'INSERT INTO ohlc (symbol, date, open_price, high_price, low_price, med_price, close_price,
+                               change_percent, volume_usd, change_volume_percent, market_cap, created_at)
+             SELECT %L, date, open_price, high_price, low_price, med_price, close_price,
+                    change_percent, volume_usd, change_volume_percent, market_cap, created_at
+             FROM %I
+             ON CONFLICT (symbol, date) DO NOTHING',
+            upper(substr(legacy.relname, 6)), legacy.relname
+        );
+        EXECUTE format('DROP TABLE %I', legacy.relname);
+        RAISE NOTICE 'Таблица % перенесена в ohlc', legacy.relname;
+    END LOOP;
+END $$;
+
+-- Состояние глубокой догрузки истории (historical_data.backfill): граница и признак, что история пройдена до конца
+CREATE TABLE IF NOT EXISTS ohlc_backfill (
+    symbol VARCHAR(20) PRIMARY KEY,
+    oldest_date DATE,
+    completed BOOLEAN NOT NULL DEFAULT FALSE,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Индикаторы по дням (crypto_api/indicators.py): пересчитываются после каждого сохранения истории монеты.
+-- rsi_avg_gain, rsi_avg_loss и peak — состояние, с которого продолжается расчёт новых дней
+CREATE TABLE IF NOT EXISTS ohlc_indicators (
+    symbol VARCHAR(20) NOT NULL,
+    date DATE NOT NULL,
+    sma_7 REAL,
+    sma_30 REAL,
+    ema_12 DOUBLE PRECISION,
+    ema_26 DOUBLE PRECISION,
+    rsi_14 REAL,
+    volatility_30 REAL,
+    drawdown REAL,
+    return_1d REAL,
+    return_7d REAL,
+    return_30d REAL,
+    rsi_avg_gain DOUBLE PRECISION,
+    rsi_avg_loss DOUBLE PRECISION,
+    peak DOUBLE PRECISION,
+    PRIMARY KEY (symbol, date)
+);
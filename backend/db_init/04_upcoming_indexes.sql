@@ -0,0 +1,43 @@
+-- Индексы под фильтры и сортировку /api/coins/
+CREATE INDEX IF NOT EXISTS upcoming_launch_date_idx ON cryptorank_upcoming (launch_date);
+CREATE INDEX IF NOT EXISTS upcoming_project_type_idx ON cryptorank_upcoming (project_type);
+CREATE INDEX IF NOT EXISTS upcoming_moni_score_idx ON cryptorank_upcoming (moni_score);
+-- Курсор ?ordering= идёт по паре (поле, id): id различает строки с одинаковым значением поля
+DROP INDEX IF EXISTS upcoming_project_name_idx;
+DROP INDEX IF EXISTS upcoming_updated_at_idx;
+DROP INDEX IF EXISTS upcoming_parsed_at_idx;
+CREATE INDEX IF NOT EXISTS upcoming_project_name_id_idx ON cryptorank_upcoming (project_name, id);
+CREATE INDEX IF NOT EXISTS upcoming_updated_at_id_idx ON cryptorank_upcoming (updated_at, id);
+CREATE INDEX IF NOT EXISTS upcoming_parsed_at_id_idx ON cryptorank_upcoming (parsed_at, id);
+
+-- Фильтр ?launchpad= выполняется как launchpad @> '["..."]'
+CREATE INDEX IF NOT EXISTS upcoming_launchpad_gin ON cryptorank_upcoming USING GIN (launchpad jsonb_path_ops);
+
+-- Ключ для INSERT ... ON CONFLICT (project_url) в upcoming.save_to_database.
+-- Раньше проекты вставлялись без ограничения: у повторов оставляем самую раннюю запись
+-- (на её id ссылаются остальные таблицы) и дописываем в неё инвесторов и launchpad из удаляемых.
+UPDATE cryptorank_upcoming AS keep SET
+    investors = merged.investors,
+    launchpad = merged.launchpad
+FROM (
+    SELECT
+        min(u.id) AS keep_id,
+        (SELECT COALESCE(jsonb_agg(DISTINCT item), '[]'::jsonb)
+         FROM cryptorank_upcoming d, jsonb_array_elements(COALESCE(d.investors, '[]'::jsonb)) AS item
+         WHERE d.project_url = u.project_url) AS investors,
+        (SELECT COALESCE(jsonb_agg(DISTINCT item), '[]'::jsonb)
+         FROM cryptorank_upcoming d, jsonb_array_elements(COALESCE(d.launchpad, '[]'::jsonb)) AS item
+         WHERE d.project_url = u.project_url) AS launchpad
+    FROM cryptorank_upcoming u
+    WHERE u.project_url IS NOT NULL
+    GROUP BY u.project_url
+    HAVING count(*) > 1
+) AS merged
+WHERE keep.id = merged.keep_id;
+
+DELETE FROM cryptorank_upcoming AS dup
+USING cryptorank_upcoming AS keep
+WHERE dup.project_url = keep.project_url
+  AND dup.id > keep.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS upcoming_project_url_key ON cryptorank_upcoming (project_url);
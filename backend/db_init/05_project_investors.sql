@@ -0,0 +1,32 @@
+-- Инвесторы проектов в нормализованном виде: строка на пару проект–инвестор.
+-- Заполняется пачками вместе с JSONB-столбцом cryptorank_upcoming.investors (investors.InvestorsWriter)
+CREATE TABLE IF NOT EXISTS project_investors (
+    id BIGSERIAL PRIMARY KEY,
+    project_id INTEGER NOT NULL REFERENCES cryptorank_upcoming (id) ON DELETE CASCADE,
+    investor VARCHAR(255) NOT NULL,
+    role VARCHAR(100),
+    tier VARCHAR(20),
+    type VARCHAR(100),
+    stage VARCHAR(100),
+    href TEXT,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS project_investors_project_idx ON project_investors (project_id);
+CREATE INDEX IF NOT EXISTS project_investors_investor_idx ON project_investors (investor);
+
+-- Первичное заполнение из уже сохранённого JSONB (только при пустой таблице)
+INSERT INTO project_investors (project_id, investor, role, tier, type, stage, href)
+SELECT u.id,
+       item ->> 'investor_name',
+       NULLIF(item ->> 'investor_role', ''),
+       NULLIF(item ->> 'investor_tier', ''),
+       NULLIF(item ->> 'investor_type', ''),
+       NULLIF(item ->> 'investor_stage', ''),
+       NULLIF(item ->> 'investor_href', '')
+FROM cryptorank_upcoming u
+CROSS JOIN LATERAL jsonb_array_elements(
+    CASE WHEN jsonb_typeof(u.investors) = 'array' THEN u.investors ELSE '[]'::jsonb END) AS item
+WHERE jsonb_typeof(item) = 'object'
+  AND COALESCE(item ->> 'investor_name', '') <> ''
+  AND NOT EXISTS (SELECT 1 FROM project_investors);
@@ -0,0 +1,11 @@
+-- Связь токеномики с проектом по id вместо сопоставления по текстовому project_name
+ALTER TABLE cryptorank_tokenomics
+    ADD COLUMN IF NOT EXISTS project_id INTEGER REFERENCES cryptorank_upcoming (id) ON DELETE SET NULL;
+
+-- Заполнение для уже сохранённой токеномики: проект с тем же именем (самый ранний, если их несколько)
+UPDATE cryptorank_tokenomics t
+SET project_id = (SELECT min(u.id) FROM cryptorank_upcoming u WHERE u.project_name = t.project_name)
+WHERE t.project_id IS NULL;
+
+-- Один проект — одна запись токеномики (NULL допускается для записей без проекта)
+CREATE UNIQUE INDEX IF NOT EXISTS tokenomics_project_id_key ON cryptorank_tokenomics (project_id);
@@ -0,0 +1,42 @@
+-- Детальная токеномика как материализованное представление: разбор JSONB выполняется при обновлении,
+-- а не в каждом запросе. Обновляется tokenomics.refresh_tokenomics_detailed() после сохранения токеномики.
+
+-- Раньше tokenomics_detailed было обычным представлением (02_views.sql)
+DO $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+               WHERE n.nspname = current_schema() AND c.relname = 'tokenomics_detailed' AND c.relkind = 'v') THEN
+        DROP VIEW tokenomics_detailed CASCADE;
+    END IF;
+END $$;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS tokenomics_detailed AS
+SELECT
+    t.project_name,
+    t.project_id,
+    -- NOT NULL: по parsed_at идёт курсорная пагинация API
+    COALESCE(t.parsed_at, t.updated_at, 'epoch'::timestamp) as parsed_at,
+    t.tokenomics->'distribution' as distribution_data,
+    t.tokenomics->'initial_values'->>'Total supply' as total_supply,
+    t.tokenomics->'initial_values'->>'Circulating supply' as circulating_supply,
+    t.tokenomics->'initial_values'->>'Max supply' as max_supply,
+    t.tokenomics->'initial_values'->>'Initial price' as initial_price,
+    t.tokenomics->'initial_values'->>'Market cap' as market_cap,
+    categories.count as categories_count,
+    CASE
+        WHEN categories.count > 0 THEN 'Complete'
+        WHEN t.tokenomics->'initial_values' IS NOT NULL THEN 'Partial'
+        ELSE 'Minimal'
+    END as data_quality
+FROM cryptorank_tokenomics t
+CROSS JOIN LATERAL (
+    SELECT COUNT(*) as count
+    FROM jsonb_object_keys(
+        CASE WHEN jsonb_typeof(t.tokenomics->'distribution') = 'object' THEN t.tokenomics->'distribution' ELSE '{}'::jsonb END)
+) categories
+WITH DATA;
+
+-- Уникальный индекс обязателен для REFRESH MATERIALIZED VIEW CONCURRENTLY (project_name уникален в источнике)
+CREATE UNIQUE INDEX IF NOT EXISTS tokenomics_detailed_project_name_key ON tokenomics_detailed (project_name);
+-- Порядок выдачи API: свежие сначала
+CREATE INDEX IF NOT EXISTS tokenomics_detailed_parsed_at_idx ON tokenomics_detailed (parsed_at DESC, project_name);
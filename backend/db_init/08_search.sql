@@ -0,0 +1,21 @@
+-- Поиск проектов (/api/search/, crypto_api/search.py): полнотекстовый по префиксам слов и нечёткий по триграммам
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Документ проекта: название и символ — вес A, launchpad-платформы — вес C.
+-- IMMUTABLE, чтобы по функции строился индекс; запросы вызывают её с теми же аргументами
+CREATE OR REPLACE FUNCTION project_search_document(name text, symbol text, launchpad jsonb)
+RETURNS tsvector
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT setweight(to_tsvector('simple', coalesce(name, '')), 'A')
+        || setweight(to_tsvector('simple', coalesce(symbol, '')), 'A')
+        || setweight(to_tsvector('simple', coalesce(launchpad::text, '')), 'C')
+$$;
+
+CREATE INDEX IF NOT EXISTS upcoming_search_document_gin ON cryptorank_upcoming
+    USING GIN (project_search_document(project_name, project_symbol, launchpad));
+CREATE INDEX IF NOT EXISTS upcoming_project_name_trgm ON cryptorank_upcoming USING GIN (lower(project_name) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS upcoming_project_symbol_trgm ON cryptorank_upcoming USING GIN (lower(project_symbol) gin_trgm_ops);
+
+-- Инвесторы ищутся по нормализованной таблице, а не по JSONB-столбцу каждой строки
+CREATE INDEX IF NOT EXISTS project_investors_investor_tsv ON project_investors USING GIN (to_tsvector('simple', investor));
+CREATE INDEX IF NOT EXISTS project_investors_investor_trgm ON project_investors USING GIN (lower(investor) gin_trgm_ops);